@@ -1,12 +1,22 @@
+import hashlib
+import io
 import json
 import os
 import tempfile
-from typing import List, Dict
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, List, Dict, Optional
 
 import streamlit as st
+from PIL import Image
 
-from app.backgrounds import prepare_background_image
-from app.cleanup import cleanup_temp
+from app.backgrounds import load_background_bytes
+from app.caption_renderer import render_caption_frame
+from app.cleanup import Workspace, janitor
+from app.config import DEFAULT_CAPTION_STYLE, ENCODER_PROFILES, VIDEO_WIDTH, VIDEO_HEIGHT
+from app.fonts import get_english_font_path, get_urdu_font_path
+from app.segment_cache import file_fingerprint
 from app.video_composer import build_video
 from app.gemini_script import generate_script_with_gemini
 
@@ -19,6 +29,144 @@ def load_example_script() -> str:
     return json.dumps(example, ensure_ascii=False, indent=2)
 
 
+# Renders running at once across all sessions of this server
+RENDER_WORKERS = 2
+
+# Seconds between reruns while a render is in progress
+PROGRESS_POLL_SECONDS = 1.0
+
+# Keep each render's small intermediates (uploads, speech, frames) on tmpfs
+RENDER_RAM_TEMP = True
+
+
+@dataclass
+class RenderJob:
+    """A session's render, updated from the worker thread through log/report."""
+
+    output_path: str
+    output_filename: str
+    future: Optional[Future] = None
+    progress: float = 0.0
+    message: str = "Queued..."
+
+    def log(self, msg: str) -> None:
+        self.message = msg
+
+    def report(self, fraction: float, stage: str) -> None:
+        self.progress = fraction
+
+
+class RenderPool:
+    """
+    Background render threads shared by every session.
+
+    Each render runs in its own temp workspace, removed when it finishes;
+    the janitor clears anything a crashed render left behind.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+
+    def submit(self, job: RenderJob, fn, *args) -> RenderJob:
+        def _run():
+            janitor()
+            with Workspace(ram=RENDER_RAM_TEMP):
+                return fn(job, *args)
+
+        job.future = self._executor.submit(_run)
+        return job
+
+
+@st.cache_resource
+def get_render_pool() -> RenderPool:
+    return RenderPool(RENDER_WORKERS)
+
+
+def _render_job(
+    job: RenderJob,
+    data: List[Dict[str, str]],
+    bg_bytes: Optional[bytes],
+    bgm_bytes: Optional[bytes],
+    bgm_volume: float,
+    draft: bool,
+    encoder_profile: Optional[str],
+) -> str:
+    """Runs on a render thread, inside its workspace: write the inputs to temp files and build the video."""
+    from app.cleanup import get_temp_script_path, get_temp_image_path, get_temp_audio_path
+
+    script_path = get_temp_script_path(suffix="_script.json")
+    with open(script_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+    # build_video prepares the upload through the background cache, which
+    # the caption preview has usually filled already
+    bg_path = None
+    if bg_bytes is not None:
+        bg_path = get_temp_image_path(suffix="_bg.jpg")
+        with open(bg_path, "wb") as f:
+            f.write(bg_bytes)
+
+    bgm_path = None
+    if bgm_bytes is not None:
+        bgm_path = get_temp_audio_path(suffix="_bgm.mp3")
+        with open(bgm_path, "wb") as f:
+            f.write(bgm_bytes)
+
+    return build_video(
+        script_path=script_path,
+        output_path=job.output_path,
+        background_path=bg_path,
+        bgm_path=bgm_path,
+        bgm_volume=bgm_volume,
+        log=job.log,
+        progress=job.report,
+        draft=draft,
+        profile=encoder_profile,
+        # Segment chunks are cached, so re-generating after an edit
+        # only renders the segments that changed
+        encoder="ffmpeg",
+    )
+
+
+# Width of the caption preview image in the editor
+PREVIEW_WIDTH = 270
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _preview_background(bg_digest: Optional[str], _bg_bytes: Optional[bytes]) -> Image.Image:
+    """Decoded, cover-cropped background for previews (shared; do not modify)."""
+    if _bg_bytes is None:
+        return Image.new("RGB", (VIDEO_WIDTH, VIDEO_HEIGHT), (15, 15, 24))
+    return load_background_bytes(_bg_bytes)
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def render_preview_frame(
+    en: str,
+    ur: str,
+    style: Dict[str, Any],
+    english_font: Optional[Dict[str, Any]],
+    urdu_font: Optional[Dict[str, Any]],
+    bg_digest: Optional[str],
+    _bg_bytes: Optional[bytes],
+) -> bytes:
+    """
+    One caption frame as a half-size PNG.
+
+    Memoized on the pair, caption style, font files and background hash, so
+    editing one script entry only re-renders that entry's frame.
+    """
+    frame = render_caption_frame(
+        _preview_background(bg_digest, _bg_bytes),
+        {"en": en, "ur": ur},
+        english_font_path=english_font["path"] if english_font else None,
+        urdu_font_path=urdu_font["path"] if urdu_font else None,
+    )
+    buf = io.BytesIO()
+    frame.resize((VIDEO_WIDTH // 2, VIDEO_HEIGHT // 2), Image.BILINEAR).save(buf, format="PNG")
+    return buf.getvalue()
+
+
 def main() -> None:
     st.set_page_config(
         page_title="Urdu-English Video Generator",
@@ -132,6 +280,24 @@ def main() -> None:
     else:
         st.sidebar.info("ℹ️ No background music")
 
+    st.sidebar.markdown("---")
+
+    draft = st.sidebar.checkbox(
+        "⚡ Draft preview",
+        value=False,
+        help="Render a quick low-resolution preview to check timing and layout"
+    )
+
+    encoder_profile = st.sidebar.selectbox(
+        "🎞️ Encoder Profile",
+        [None] + list(ENCODER_PROFILES),
+        format_func=lambda name: "Auto" if name is None else name.capitalize(),
+        help=(
+            "Trade encoding speed for file size and quality (Auto picks the calibrated profile "
+            "if 'python -m app.cli calibrate' has been run, else 'still'; 'draft' for previews)"
+        )
+    )
+
     # Main Content Area
     st.markdown("### 📝 Script Generation")
     
@@ -212,6 +378,35 @@ def main() -> None:
     if script_text != st.session_state["script_text"]:
         st.session_state["script_text"] = script_text
 
+    # Caption Preview
+    try:
+        preview_pairs = json.loads(script_text)
+    except json.JSONDecodeError:
+        preview_pairs = None
+    if isinstance(preview_pairs, list) and preview_pairs and all(isinstance(p, dict) for p in preview_pairs):
+        with st.expander("👁️ Caption Preview", expanded=True):
+            index = st.selectbox(
+                "Segment",
+                range(len(preview_pairs)),
+                format_func=lambda i: f"{i + 1}. {preview_pairs[i].get('en', '')}",
+                help="Preview how this segment's caption box will look"
+            )
+            pair = preview_pairs[index]
+            bg_bytes = bg_file.getvalue() if bg_file is not None else None
+            try:
+                png = render_preview_frame(
+                    str(pair.get("en", "")),
+                    str(pair.get("ur", "")),
+                    asdict(DEFAULT_CAPTION_STYLE),
+                    file_fingerprint(get_english_font_path(None)),
+                    file_fingerprint(get_urdu_font_path(None)),
+                    hashlib.sha256(bg_bytes).hexdigest() if bg_bytes is not None else None,
+                    bg_bytes,
+                )
+                st.image(png, width=PREVIEW_WIDTH)
+            except Exception as e:
+                st.warning(f"⚠️ Could not render preview: {e}")
+
 
 
     # Video Generation
@@ -221,73 +416,65 @@ def main() -> None:
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
     
-    # Generate filename with timestamp
+    # Generate filename with timestamp (and a suffix, as sessions share output/)
+    import uuid
     from datetime import datetime
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_filename = f"urdu_video_{timestamp}.mp4"
+    output_filename = f"urdu_video_{timestamp}_{uuid.uuid4().hex[:6]}{'_draft' if draft else ''}.mp4"
     output_path = os.path.join(output_dir, output_filename)
 
-    if st.button("🎥 Generate Video", use_container_width=True, type="primary"):
-        with st.spinner("🎬 Creating your video... This may take a while."):
-            try:
-                from app.cleanup import get_temp_script_path, get_temp_image_path, get_temp_audio_path
-                
-                data = json.loads(script_text)
-                
-                # Use organized temp directory
-                script_path = get_temp_script_path(suffix="_script.json")
-                with open(script_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-
-                bg_path = None
-                if bg_file is not None:
-                    bg_tmp = get_temp_image_path(suffix="_bg.jpg")
-                    with open(bg_tmp, "wb") as f:
-                        f.write(bg_file.read())
-                    bg_path = prepare_background_image(bg_tmp)
-                
-                # Handle BGM upload
-                bgm_path = None
-                if bgm_file is not None:
-                    bgm_tmp = get_temp_audio_path(suffix="_bgm.mp3")
-                    with open(bgm_tmp, "wb") as f:
-                        f.write(bgm_file.read())
-                    bgm_path = bgm_tmp
-
-                build_video(
-                    script_path=script_path,
-                    output_path=output_path,
-                    background_path=bg_path,
-                    bgm_path=bgm_path,
-                    bgm_volume=bgm_volume,
-                )
+    job: Optional[RenderJob] = st.session_state.get("render_job")
+    running = job is not None and not job.future.done()
 
-                st.success("🎉 Video generated successfully!")
-                
-                # Display video preview
-                st.video(output_path)
-                
-                # Download button
-                with open(output_path, "rb") as f:
-                    st.download_button(
-                        label="📥 Download Video",
-                        data=f,
-                        file_name=output_filename,
-                        mime="video/mp4",
-                        use_container_width=True
-                    )
+    if st.button("🎥 Generate Video", use_container_width=True, type="primary", disabled=running):
+        try:
+            data = json.loads(script_text)
+            # Uploads belong to this session, so read them before handing off
+            job = get_render_pool().submit(
+                RenderJob(output_path=output_path, output_filename=output_filename),
+                _render_job,
+                data,
+                bg_file.getvalue() if bg_file is not None else None,
+                bgm_file.getvalue() if bgm_file is not None else None,
+                bgm_volume,
+                draft,
+                encoder_profile,
+            )
+            st.session_state["render_job"] = job
+            running = True
+        except json.JSONDecodeError:
+            st.error("❌ Invalid JSON format. Please check your script.")
 
-            except json.JSONDecodeError:
-                st.error("❌ Invalid JSON format. Please check your script.")
-            except Exception as e:
-                st.error(f"❌ Error: {e}")
-            finally:
-                cleanup_temp()
+    if job is not None:
+        if running:
+            st.progress(min(max(job.progress, 0.0), 1.0), text=f"🎬 {job.message}")
+        elif job.future.exception() is not None:
+            st.error(f"❌ Error: {job.future.exception()}")
+        else:
+            st.success("🎉 Video generated successfully!")
+
+            # Display video preview
+            st.video(job.output_path)
+
+            # Download button
+            with open(job.output_path, "rb") as f:
+                st.download_button(
+                    label="📥 Download Video",
+                    data=f,
+                    file_name=job.output_filename,
+                    mime="video/mp4",
+                    use_container_width=True
+                )
     
     # Footer
     st.markdown("---")
     st.markdown("<p style='text-align: center; color: #a0aec0; font-size: 0.9rem;'>Powered by Gemini 2.0 Flash AI 🚀</p>", unsafe_allow_html=True)
 
+    # Poll the background render; the rest of the page stays interactive
+    if running:
+        time.sleep(PROGRESS_POLL_SECONDS)
+        st.rerun()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,299 @@
+import bisect
+import math
+import os
+import subprocess
+import wave
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import CACHE_ROOT
+from .disk_cache import DiskCache, cached_array, file_digest, make_key
+from .ffmpeg_encoder import ffmpeg_binary
+
+
+# Matches what MoviePy's write_videofile uses for the audio stream
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+# Fade applied to each segment's voice track
+SEGMENT_AUDIO_FADE = 0.12
+
+# Decoded background music, stored as .npy so it can be memory-mapped
+BGM_CACHE_DIR = os.path.join(CACHE_ROOT, "bgm")
+BGM_CACHE_MAX_BYTES = 512 * 1024 * 1024
+_BGM_BUFFERS: Dict[str, np.ndarray] = {}
+_BGM_BUFFERS_MAX = 4
+
+# Streaming block size and the ramp used when ducking music under voice
+BGM_CHUNK_SECONDS = 5.0
+BGM_DUCK_RAMP = 0.15
+
+
+@dataclass
+class SegmentAudio:
+    """Voice clips of one segment, placed on the output timeline."""
+
+    start: float
+    # (audio path, offset in seconds from the segment start)
+    tracks: List[Tuple[str, float]] = field(default_factory=list)
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS) -> np.ndarray:
+    """Decode any ffmpeg-readable file to float32 samples of shape (n, channels)."""
+    cmd = [
+        ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+        "-i", path,
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "-ar", str(sample_rate), "-ac", str(channels),
+        "-",
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        err = proc.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"Could not decode audio {path}: {err[-500:]}")
+    return np.frombuffer(proc.stdout, dtype="<f4").reshape(-1, channels)
+
+
+def fade_gain(length: int, sample_rate: int, fade_in: float, fade_out: float) -> np.ndarray:
+    """Linear fade-in/fade-out gain ramp, as MoviePy's audio_fadein/audio_fadeout apply."""
+    t = np.arange(length, dtype=np.float32) / sample_rate
+    gain = np.ones(length, dtype=np.float32)
+    if fade_in > 0:
+        gain = np.minimum(gain, t / fade_in)
+    if fade_out > 0:
+        gain = np.minimum(gain, (length / sample_rate - t) / fade_out)
+    return np.clip(gain, 0.0, 1.0)
+
+
+def mix_segment(
+    segment: SegmentAudio,
+    sample_rate: int = SAMPLE_RATE,
+    fade: float = SEGMENT_AUDIO_FADE,
+    decoded: Optional[Dict[str, np.ndarray]] = None,
+) -> np.ndarray:
+    """Mix one segment's clips at their offsets and apply the segment fade."""
+    decoded = {} if decoded is None else decoded
+    placed = []
+    length = 0
+    for path, offset in segment.tracks:
+        samples = decoded.get(path)
+        if samples is None:
+            samples = decoded[path] = decode_audio(path, sample_rate)
+        begin = int(round(offset * sample_rate))
+        placed.append((begin, samples))
+        length = max(length, begin + len(samples))
+
+    mixed = np.zeros((length, CHANNELS), dtype=np.float32)
+    for begin, samples in placed:
+        mixed[begin:begin + len(samples)] += samples
+    mixed *= fade_gain(length, sample_rate, fade, fade)[:, None]
+    return mixed
+
+
+def mix_timeline(
+    segments: Sequence[SegmentAudio],
+    duration: float,
+    sample_rate: int = SAMPLE_RATE,
+    fade: float = SEGMENT_AUDIO_FADE,
+) -> np.ndarray:
+    """
+    Lay every segment's voice clips onto one preallocated PCM timeline.
+
+    Each distinct file is decoded once, however many segments use it.
+    """
+    timeline = np.zeros((int(math.ceil(duration * sample_rate)), CHANNELS), dtype=np.float32)
+    decoded: Dict[str, np.ndarray] = {}
+    for segment in segments:
+        mixed = mix_segment(segment, sample_rate, fade, decoded)
+        begin = int(round(segment.start * sample_rate))
+        end = min(len(timeline), begin + len(mixed))
+        if end > begin:
+            timeline[begin:end] += mixed[:end - begin]
+    return timeline
+
+
+def fit_length(samples: np.ndarray, length: int) -> np.ndarray:
+    """Pad with silence or truncate samples to exactly length frames."""
+    if len(samples) >= length:
+        return samples[:length]
+    pad = np.zeros((length - len(samples),) + samples.shape[1:], dtype=samples.dtype)
+    return np.concatenate([samples, pad])
+
+
+class WavAppender:
+    """Append WAV files with identical formats to one output as they become available."""
+
+    def __init__(self, out_path: str, block_frames: int = 1 << 16) -> None:
+        self.out_path = out_path
+        self.block_frames = block_frames
+        self._dst = wave.open(out_path, "wb")
+        self._params_set = False
+
+    def append(self, path: str) -> None:
+        with wave.open(path, "rb") as src:
+            if not self._params_set:
+                self._dst.setnchannels(src.getnchannels())
+                self._dst.setsampwidth(src.getsampwidth())
+                self._dst.setframerate(src.getframerate())
+                self._params_set = True
+            while True:
+                raw = src.readframes(self.block_frames)
+                if not raw:
+                    break
+                self._dst.writeframes(raw)
+
+    def close(self) -> None:
+        self._dst.close()
+
+    def __enter__(self) -> "WavAppender":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def concat_wavs(paths: Sequence[str], out_path: str, block_frames: int = 1 << 16) -> str:
+    """Join WAV files with identical formats, copying in fixed-size blocks."""
+    with WavAppender(out_path, block_frames) as dst:
+        for path in paths:
+            dst.append(path)
+    return out_path
+
+
+def write_wav(samples: np.ndarray, path: str, sample_rate: int = SAMPLE_RATE) -> str:
+    """Write float samples in [-1, 1] as 16-bit PCM WAV."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(pcm.shape[1] if pcm.ndim > 1 else 1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return path
+
+
+def load_bgm(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decoded background music as float32 (n, CHANNELS) samples.
+
+    The decode is cached on disk by file content and kept memory-mapped in
+    process, so the same music bed is only ever decoded once.
+    """
+    def _decode() -> np.ndarray:
+        samples = decode_audio(path, sample_rate)
+        if len(samples) == 0:
+            raise RuntimeError(f"Background music {path} contains no audio")
+        return samples
+
+    return cached_array(
+        DiskCache(BGM_CACHE_DIR, BGM_CACHE_MAX_BYTES),
+        make_key("bgm", file_digest(path), sample_rate, CHANNELS),
+        "pcm.npy",
+        _decode,
+        _BGM_BUFFERS,
+        _BGM_BUFFERS_MAX,
+    )
+
+
+def merge_regions(regions: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Sort (start, end) intervals and merge the overlapping ones."""
+    merged: List[Tuple[float, float]] = []
+    for start, end in sorted(regions):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def duck_gain(
+    start: int,
+    length: int,
+    regions: Sequence[Tuple[float, float]],
+    duck: float,
+    sample_rate: int = SAMPLE_RATE,
+    ramp: float = BGM_DUCK_RAMP,
+) -> np.ndarray:
+    """
+    Gain for samples [start, start + length): duck inside voice regions,
+    1.0 elsewhere, with linear ramps of ramp seconds around each region.
+
+    regions must be sorted and non-overlapping (see merge_regions).
+    """
+    gain = np.ones(length, dtype=np.float32)
+    if duck >= 1.0 or not regions:
+        return gain
+    t0 = start / sample_rate
+    t1 = (start + length) / sample_rate
+    t = t0 + np.arange(length, dtype=np.float32) / sample_rate
+    coverage = np.zeros(length, dtype=np.float32)
+    ends = [r[1] for r in regions]
+    # Only regions whose ramps can reach this block
+    first = bisect.bisect_left(ends, t0 - ramp)
+    for region_start, region_end in regions[first:]:
+        if region_start - ramp > t1:
+            break
+        if region_end + ramp < t0:
+            continue
+        inside = np.minimum(t - (region_start - ramp), (region_end + ramp) - t) / max(ramp, 1e-6)
+        np.maximum(coverage, np.clip(inside, 0.0, 1.0), out=coverage)
+    gain -= (1.0 - duck) * coverage
+    return gain
+
+
+def stream_mix_bgm(
+    voice_path: str,
+    bgm_path: str,
+    out_path: str,
+    volume: float = 0.1,
+    duck: float = 1.0,
+    voice_regions: Optional[Sequence[Tuple[float, float]]] = None,
+    chunk_seconds: float = BGM_CHUNK_SECONDS,
+) -> str:
+    """
+    Mix looped background music under a 16-bit voice WAV, block by block.
+
+    Loops are produced by modular indexing into the decoded music, so memory
+    stays constant however long the voice track is.
+
+    Args:
+        voice_path: 16-bit PCM WAV with CHANNELS channels
+        bgm_path: Music file in any ffmpeg-readable format
+        out_path: Destination WAV
+        volume: Music gain
+        duck: Extra music gain inside voice_regions (1.0 disables ducking)
+        voice_regions: (start, end) times in seconds where voice plays
+        chunk_seconds: Block size for streaming
+
+    Returns:
+        out_path
+    """
+    regions = merge_regions(voice_regions or [])
+    with wave.open(voice_path, "rb") as src:
+        sample_rate = src.getframerate()
+        channels = src.getnchannels()
+        if src.getsampwidth() != 2:
+            raise ValueError(f"{voice_path} is not 16-bit PCM")
+        music = load_bgm(bgm_path, sample_rate)
+        if music.shape[1] != channels:
+            music = np.repeat(music.mean(axis=1, keepdims=True), channels, axis=1)
+        chunk = max(1, int(chunk_seconds * sample_rate))
+
+        with wave.open(out_path, "wb") as dst:
+            dst.setnchannels(channels)
+            dst.setsampwidth(2)
+            dst.setframerate(sample_rate)
+            position = 0
+            while True:
+                raw = src.readframes(chunk)
+                if not raw:
+                    break
+                voice = np.frombuffer(raw, dtype="<i2").reshape(-1, channels).astype(np.float32) / 32767
+                n = len(voice)
+                indices = (position + np.arange(n)) % len(music)
+                gain = volume * duck_gain(position, n, regions, duck, sample_rate)
+                mixed = voice + music[indices] * gain[:, None]
+                dst.writeframes((np.clip(mixed, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+                position += n
+    return out_path
@@ -1,37 +1,102 @@
+import hashlib
+import io
+import math
 import os
-import tempfile
+from typing import Callable, Dict, Tuple, Union
+
+import numpy as np
 from PIL import Image
 
-from .config import VIDEO_WIDTH, VIDEO_HEIGHT
+from .config import CACHE_ROOT, VIDEO_WIDTH, VIDEO_HEIGHT
+from .disk_cache import DiskCache, cached_array, file_digest, make_key
 
 
 if not hasattr(Image, "ANTIALIAS"):
     Image.ANTIALIAS = Image.LANCZOS
 
+# Prepared (cover-cropped, video-sized) backgrounds, stored as .npy so they
+# can be memory-mapped; keyed by source content and target size
+BACKGROUND_CACHE_DIR = os.path.join(CACHE_ROOT, "backgrounds")
+BACKGROUND_CACHE_MAX_BYTES = 256 * 1024 * 1024
+_BACKGROUND_CACHE_VERSION = 1
+_BACKGROUND_FRAMES: Dict[str, np.ndarray] = {}
+_BACKGROUND_FRAMES_MAX = 4
 
-def prepare_background_image(source_path: str) -> str:
-    from .cleanup import get_temp_image_path
-    
-    img = Image.open(source_path).convert("RGB")
+VIDEO_SIZE = (VIDEO_WIDTH, VIDEO_HEIGHT)
+
+
+def cover_crop(img: Image.Image, size: Tuple[int, int] = VIDEO_SIZE) -> Image.Image:
+    """Scale img to cover size (default: the video frame) and center-crop the overflow."""
+    target_w, target_h = size
     src_w, src_h = img.size
-    target_ratio = VIDEO_WIDTH / VIDEO_HEIGHT
+    target_ratio = target_w / target_h
     src_ratio = src_w / src_h
     if abs(src_ratio - target_ratio) < 0.01:
-        resized = img.resize((VIDEO_WIDTH, VIDEO_HEIGHT), Image.LANCZOS)
+        return img.resize((target_w, target_h), Image.LANCZOS)
     elif src_ratio > target_ratio:
-        new_height = VIDEO_HEIGHT
+        new_height = target_h
         new_width = int(new_height * src_ratio)
         resized = img.resize((new_width, new_height), Image.LANCZOS)
-        left = (new_width - VIDEO_WIDTH) // 2
-        resized = resized.crop((left, 0, left + VIDEO_WIDTH, VIDEO_HEIGHT))
+        left = (new_width - target_w) // 2
+        return resized.crop((left, 0, left + target_w, target_h))
     else:
-        new_width = VIDEO_WIDTH
+        new_width = target_w
         new_height = int(new_width / src_ratio)
         resized = img.resize((new_width, new_height), Image.LANCZOS)
-        top = (new_height - VIDEO_HEIGHT) // 2
-        resized = resized.crop((0, top, VIDEO_WIDTH, top + VIDEO_HEIGHT))
-    
+        top = (new_height - target_h) // 2
+        return resized.crop((0, top, target_w, top + target_h))
+
+
+def _decode_prepared(source, size: Tuple[int, int] = VIDEO_SIZE) -> Image.Image:
+    """Decode source (path or file object) straight to a cover-cropped RGB frame of size."""
+    img = Image.open(source)
+    if img.size == size:
+        # Already prepared: no resample needed
+        return img.convert("RGB")
+    scale = max(size[0] / img.width, size[1] / img.height)
+    if scale < 1 and img.format == "JPEG":
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale while still covering the frame
+        img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    img = img.convert("RGB")
+    if img.size == size:
+        return img
+    return cover_crop(img, size)
+
+
+def _cached_background(digest: str, open_source: Callable, size: Tuple[int, int]) -> Image.Image:
+    frame = cached_array(
+        DiskCache(BACKGROUND_CACHE_DIR, BACKGROUND_CACHE_MAX_BYTES),
+        make_key("background", _BACKGROUND_CACHE_VERSION, digest, list(size)),
+        "frame.npy",
+        lambda: np.asarray(_decode_prepared(open_source(), size)),
+        _BACKGROUND_FRAMES,
+        _BACKGROUND_FRAMES_MAX,
+        {"size": list(size)},
+    )
+    return Image.fromarray(frame, "RGB")
+
+
+def load_background(source_path: str, size: Tuple[int, int] = VIDEO_SIZE) -> Image.Image:
+    """
+    Background image as a cover-cropped RGB frame of size (default: the video frame).
+
+    The prepared frame is cached on disk by file content and size and kept
+    memory-mapped in process, so each distinct image is decoded and resized
+    once. Oversized JPEGs are decoded at reduced scale; inputs already at
+    size skip the resize.
+    """
+    return _cached_background(file_digest(source_path), lambda: source_path, size)
+
+
+def load_background_bytes(data: Union[bytes, bytearray], size: Tuple[int, int] = VIDEO_SIZE) -> Image.Image:
+    """load_background for an in-memory image (e.g. an upload); shares the same cache entries."""
+    return _cached_background(hashlib.sha256(data).hexdigest(), lambda: io.BytesIO(data), size)
+
+
+def prepare_background_image(source_path: str) -> str:
+    """Write the prepared background to a temp JPEG and return its path."""
+    from .cleanup import get_temp_image_path
+
     out_path = get_temp_image_path(suffix="_bg_final.jpg")
-    resized.save(out_path, format="JPEG", quality=95)
+    load_background(source_path).save(out_path, format="JPEG", quality=95)
     return out_path
-
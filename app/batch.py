@@ -0,0 +1,209 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .backgrounds import load_background
+from .cleanup import Workspace
+from .ffmpeg_encoder import available_cores
+from .fonts import get_english_font_path, get_urdu_font_path
+
+
+@dataclass
+class BatchJob:
+    """One script to render, with its own background, music and output."""
+
+    script: str
+    output: str
+    background: Optional[str] = None
+    bgm: Optional[str] = None
+    bgm_volume: float = 0.1
+    bgm_duck: float = 1.0
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchSummary:
+    results: List[BatchResult] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for r in self.results if r.error is None)
+
+    @property
+    def videos_per_hour(self) -> float:
+        if self.wall_seconds <= 0:
+            return 0.0
+        return self.succeeded * 3600.0 / self.wall_seconds
+
+
+def _resolve(base_dir: str, path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def load_jobs(
+    source: str,
+    output_dir: Optional[str] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> List[BatchJob]:
+    """
+    Build the job list from a manifest file or a directory of scripts.
+
+    A manifest is a JSON list of objects with a "script" key and optional
+    "output", "background", "bgm", "bgm_volume" and "bgm_duck"; relative paths
+    are resolved against the manifest's directory. A directory yields one job
+    per *.json or *.jsonl script, written to output_dir as <name>.mp4.
+
+    Args:
+        source: Manifest path or script directory
+        output_dir: Where outputs without an explicit path go (default: source dir)
+        defaults: Values for fields a job does not set
+
+    Returns:
+        Jobs in manifest (or sorted file name) order
+    """
+    defaults = {k: v for k, v in (defaults or {}).items() if v is not None}
+
+    if os.path.isdir(source):
+        base_dir = source
+        scripts = glob.glob(os.path.join(source, "*.json")) + glob.glob(os.path.join(source, "*.jsonl"))
+        entries = [{"script": os.path.basename(p)} for p in sorted(scripts)]
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError("Batch manifest must be a list of job objects")
+
+    output_dir = output_dir or base_dir
+    jobs: List[BatchJob] = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("script"):
+            raise ValueError(f"Batch job {i} has no 'script'")
+        merged = {**defaults, **entry}
+        script = _resolve(base_dir, merged["script"])
+        output = merged.get("output")
+        if output:
+            output = _resolve(base_dir, output)
+        else:
+            name = os.path.splitext(os.path.basename(script))[0]
+            output = os.path.join(output_dir, f"{name}.mp4")
+        jobs.append(
+            BatchJob(
+                script=script,
+                output=output,
+                background=_resolve(base_dir, merged.get("background")),
+                bgm=_resolve(base_dir, merged.get("bgm")),
+                bgm_volume=float(merged.get("bgm_volume", 0.1)),
+                bgm_duck=float(merged.get("bgm_duck", 1.0)),
+            )
+        )
+    return jobs
+
+
+def _run_job(job: BatchJob, build_kwargs: Dict[str, Any], ram_temp: bool, keep_temp: bool) -> BatchResult:
+    """Worker entry point: render one job in its own workspace, reporting failure instead of raising."""
+    from .video_composer import build_video
+
+    started = time.perf_counter()
+    try:
+        if job.output and os.path.dirname(job.output):
+            os.makedirs(os.path.dirname(job.output), exist_ok=True)
+        with Workspace(ram=ram_temp, keep=keep_temp):
+            build_video(
+                script_path=job.script,
+                output_path=job.output,
+                background_path=job.background,
+                bgm_path=job.bgm,
+                bgm_volume=job.bgm_volume,
+                bgm_duck=job.bgm_duck,
+                **build_kwargs,
+            )
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return BatchResult(job=job, seconds=time.perf_counter() - started, error=error)
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    workers: int = 1,
+    log: Optional[Callable[[str], None]] = None,
+    ram_temp: bool = False,
+    keep_temp: bool = False,
+    **build_kwargs: Any,
+) -> BatchSummary:
+    """
+    Render jobs in a pool of long-lived worker processes.
+
+    Fonts are resolved and each distinct background is prepared into the
+    background cache once in the parent; workers keep their in-process
+    caches (loaded fonts, shaped text, decoded music) across jobs, and the
+    on-disk TTS, segment and music caches are shared by every worker. The
+    encoder threads are split between the concurrent jobs.
+
+    Args:
+        jobs: Jobs to render
+        workers: Number of worker processes (1 renders in this process)
+        log: Called with one line per finished job
+        ram_temp: Keep small intermediates on tmpfs (see cleanup.Workspace)
+        keep_temp: Leave each job's workspace behind for inspection
+        **build_kwargs: Passed to build_video for every job
+
+    Returns:
+        Per-job results in job order and the total wall time
+    """
+    started = time.perf_counter()
+
+    build_kwargs["english_font_path"] = get_english_font_path(build_kwargs.get("english_font_path"))
+    build_kwargs["urdu_font_path"] = get_urdu_font_path(build_kwargs.get("urdu_font_path"))
+
+    # Workers then map the prepared frame instead of decoding the image again
+    for background in {job.background for job in jobs if job.background}:
+        if os.path.isfile(background):
+            load_background(background)
+
+    pool_size = min(workers, len(jobs))
+    if pool_size > 1:
+        # Each job's encoder would otherwise start a thread per core; the
+        # profile itself is still resolved per job (.jsonl scripts stream
+        # through the ffmpeg encoder whatever encoder is set)
+        build_kwargs["threads"] = max(1, available_cores() // pool_size)
+
+    results: List[Optional[BatchResult]] = [None] * len(jobs)
+
+    def _finish(i: int, result: BatchResult) -> None:
+        job = jobs[i]
+        results[i] = result
+        if log:
+            status = "ok" if result.error is None else f"FAILED ({result.error})"
+            log(
+                f"[batch {i + 1}/{len(jobs)}] {os.path.basename(job.script)} -> {job.output}: "
+                f"{status} in {result.seconds:.1f}s"
+            )
+
+    if pool_size <= 1:
+        for i, job in enumerate(jobs):
+            _finish(i, _run_job(job, build_kwargs, ram_temp, keep_temp))
+    else:
+        with ProcessPoolExecutor(max_workers=pool_size) as pool:
+            futures = {
+                pool.submit(_run_job, job, build_kwargs, ram_temp, keep_temp): i
+                for i, job in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                _finish(futures[future], future.result())
+
+    return BatchSummary(results=results, wall_seconds=time.perf_counter() - started)
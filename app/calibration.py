@@ -0,0 +1,186 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from .config import (
+    ENCODER_CALIBRATION_PATH,
+    ENCODER_PROFILES,
+    FPS,
+    VIDEO_HEIGHT,
+    VIDEO_WIDTH,
+)
+from .ffmpeg_encoder import (
+    StillSegment,
+    available_cores,
+    encode_still_segment,
+    ffmpeg_binary,
+    frames_for_duration,
+)
+
+
+# Caption drawn on the synthetic calibration clip
+CALIBRATION_PAIR = {"en": "The quick brown fox jumps over the lazy dog", "ur": "میں اردو سیکھ رہا ہوں"}
+
+
+@dataclass
+class CalibrationResult:
+    profile: str
+    seconds: float
+    psnr: float
+    size_bytes: int
+
+
+def _synthetic_frame() -> Image.Image:
+    """A caption over a textured background, so presets differ measurably in quality."""
+    from .caption_renderer import render_caption_frame
+
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:VIDEO_HEIGHT, 0:VIDEO_WIDTH]
+    gradient = np.stack([x * 255 / VIDEO_WIDTH, y * 255 / VIDEO_HEIGHT, np.full(x.shape, 96.0)], axis=-1)
+    # Luma-only grain: chroma noise would be lost to 4:2:0 subsampling by every profile alike
+    noise = rng.normal(0, 8, size=gradient.shape[:2])[..., None]
+    background = Image.fromarray(np.clip(gradient + noise, 0, 255).astype(np.uint8), "RGB")
+    return render_caption_frame(background, CALIBRATION_PAIR)
+
+
+def calibrated_profile(path: str = ENCODER_CALIBRATION_PATH) -> Optional[str]:
+    """
+    The fastest qualifying profile recorded by calibrate(), or None.
+
+    Results recorded on a machine with a different core count (e.g. from a
+    copied cache directory) are ignored.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict):
+        return None
+    name = record.get("fastest")
+    if not isinstance(name, str) or name not in ENCODER_PROFILES:
+        return None
+    if (record.get("machine") or {}).get("cores") != available_cores():
+        return None
+    return name
+
+
+def clip_psnr(video_path: str, reference: Image.Image) -> float:
+    """PSNR (dB) of every decoded frame of video_path against one RGB reference frame."""
+    ref = np.asarray(reference.convert("RGB"), dtype=np.float64)
+    frame_bytes = ref.size
+    cmd = [
+        ffmpeg_binary(), "-hide_banner", "-loglevel", "error",
+        "-i", video_path,
+        "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    squared_error = 0.0
+    frames = 0
+    try:
+        while True:
+            raw = proc.stdout.read(frame_bytes)
+            if len(raw) < frame_bytes:
+                break
+            frame = np.frombuffer(raw, dtype=np.uint8).reshape(ref.shape)
+            squared_error += float(np.mean((frame - ref) ** 2))
+            frames += 1
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    if frames == 0:
+        raise RuntimeError(f"Could not decode {video_path}")
+    mse = squared_error / frames
+    return float("inf") if mse == 0 else 10 * math.log10(255.0 ** 2 / mse)
+
+
+def calibrate(
+    profiles: Optional[List[str]] = None,
+    clip_seconds: float = 4.0,
+    target_psnr: float = 40.0,
+    output_path: str = ENCODER_CALIBRATION_PATH,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Time each encoder profile on a synthetic still clip on this machine.
+
+    Args:
+        profiles: Names from ENCODER_PROFILES (default: all)
+        clip_seconds: Length of the calibration clip
+        target_psnr: Minimum quality (dB) a profile must reach to be picked
+        output_path: Where the results are recorded as JSON
+        log: Called with one line per profile
+
+    Returns:
+        The recorded results, including "fastest": the quickest profile that
+        meets target_psnr (None if none does)
+    """
+    from .cleanup import get_temp_image_path, get_temp_video_path
+
+    names = profiles or list(ENCODER_PROFILES)
+    for name in names:
+        if name not in ENCODER_PROFILES:
+            raise ValueError(f"Unknown encoder profile {name!r}")
+
+    reference = _synthetic_frame()
+    frame_path = get_temp_image_path(suffix="_calibration.png")
+    reference.save(frame_path, format="PNG", compress_level=1)
+    frames = frames_for_duration(clip_seconds, FPS)
+
+    results: List[CalibrationResult] = []
+    for name in names:
+        profile = ENCODER_PROFILES[name]
+        out_path = get_temp_video_path(suffix=f"_calibration_{name}.mp4")
+        started = time.perf_counter()
+        encode_still_segment(
+            StillSegment(image_path=frame_path, frames=frames, fade=0.0),
+            out_path,
+            fps=FPS,
+            codec=profile.codec,
+            preset=profile.preset,
+            threads=profile.threads or available_cores(),
+            crf=profile.crf,
+            tune=profile.tune,
+        )
+        seconds = time.perf_counter() - started
+        result = CalibrationResult(
+            profile=name,
+            seconds=round(seconds, 4),
+            psnr=round(clip_psnr(out_path, reference), 2),
+            size_bytes=os.path.getsize(out_path),
+        )
+        results.append(result)
+        if log:
+            log(f"[calibrate] {name}: {result.seconds:.2f}s, {result.psnr:.2f} dB, {result.size_bytes} bytes")
+
+    qualifying = [r for r in results if r.psnr >= target_psnr]
+    fastest = min(qualifying, key=lambda r: r.seconds).profile if qualifying else None
+    record = {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cores": available_cores(),
+        },
+        "timestamp": time.time(),
+        "clip_seconds": clip_seconds,
+        "target_psnr": target_psnr,
+        "results": [asdict(r) for r in results],
+        "fastest": fastest,
+    }
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, output_path)
+    return record
+
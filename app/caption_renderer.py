@@ -1,12 +1,18 @@
-from typing import Tuple, List, Dict
+from functools import lru_cache
+from typing import Tuple, List, Dict, Union
 
-from PIL import Image, ImageDraw, ImageFilter
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
 
+from .backgrounds import load_background
 from .config import VIDEO_WIDTH, VIDEO_HEIGHT, DEFAULT_CAPTION_STYLE
 from .fonts import get_urdu_font_path, get_english_font_path, load_font
 from .urdu_text import wrap_text_rtl, wrap_text_ltr, measure_multiline
 
 
+# Supersampled box+shadow sprites are several MB each, so keep only a few
+_BOX_SPRITE_CACHE_SIZE = 8
+
+
 def _draw_rounded_rectangle_with_shadow(
     base: Image.Image,
     box: Tuple[int, int, int, int],
@@ -21,7 +27,8 @@ def _draw_rounded_rectangle_with_shadow(
     shadow_draw = ImageDraw.Draw(shadow)
     shadow_box = (x1 + shadow_offset, y1 + shadow_offset, x2 + shadow_offset, y2 + shadow_offset)
     shadow_draw.rounded_rectangle(shadow_box, radius=radius, fill=(0, 0, 0, 120))
-    shadow = shadow.filter(ImageFilter.GaussianBlur(shadow_blur_radius))
+    if shadow_blur_radius > 0:
+        shadow = shadow.filter(ImageFilter.GaussianBlur(shadow_blur_radius))
     base.alpha_composite(shadow)
 
     overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
@@ -30,31 +37,71 @@ def _draw_rounded_rectangle_with_shadow(
     base.alpha_composite(overlay)
 
 
+@lru_cache(maxsize=_BOX_SPRITE_CACHE_SIZE)
+def _box_sprite(
+    width: int,
+    height: int,
+    radius: int,
+    opacity: int,
+    shadow_offset: int,
+    shadow_blur_radius: int,
+    pad: int,
+) -> Image.Image:
+    """
+    Pre-blurred shadow with the box on top, as an RGBA tile with pad pixels
+    of margin on every side. All values are at supersampled scale.
+
+    The returned image is shared between callers and must not be modified.
+    """
+    sprite = Image.new("RGBA", (width + 2 * pad, height + 2 * pad), (0, 0, 0, 0))
+    _draw_rounded_rectangle_with_shadow(
+        sprite,
+        (pad, pad, pad + width, pad + height),
+        radius=radius,
+        opacity=opacity,
+        shadow_offset=shadow_offset,
+        shadow_blur_radius=shadow_blur_radius,
+    )
+    return sprite
+
+
 def render_caption_frame(
-    background_path: str,
+    background: Union[str, Image.Image],
     pair: Dict[str, str],
     english_font_path: str | None = None,
     urdu_font_path: str | None = None,
+    draft: bool = False,
 ) -> Image.Image:
+    """
+    Render one caption frame.
+
+    background may be a file path or an already decoded RGB image; callers
+    rendering many segments should decode it once (see load_background) and
+    pass the image so it is not re-read for every frame.
+
+    draft skips supersampling and the shadow blur, for quick previews.
+    """
     style = DEFAULT_CAPTION_STYLE
 
-    bg = Image.open(background_path).convert("RGB").resize((VIDEO_WIDTH, VIDEO_HEIGHT))
+    if isinstance(background, Image.Image):
+        bg = background
+        if bg.size != (VIDEO_WIDTH, VIDEO_HEIGHT):
+            bg = bg.resize((VIDEO_WIDTH, VIDEO_HEIGHT))
+    else:
+        bg = load_background(background)
     img = bg.convert("RGBA")
-    draw = ImageDraw.Draw(img)
 
     en_font_path_resolved = get_english_font_path(english_font_path)
     ur_font_path_resolved = get_urdu_font_path(urdu_font_path)
 
     # Supersampling factor
-    scale = 2
-    
-    # Create high-res canvas
-    # We render the text on a separate high-res layer then paste it down
-    # But to keep it simple with the existing background logic, let's just draw text high-res
-    # Actually, simpler: Draw everything on a scaled-up transparent layer, then resize and composite.
-    
-    text_layer = Image.new("RGBA", (VIDEO_WIDTH * scale, VIDEO_HEIGHT * scale), (0, 0, 0, 0))
-    text_draw = ImageDraw.Draw(text_layer)
+    scale = 1 if draft else 2
+    shadow_blur_radius = 0 if draft else style.shadow_blur_radius
+    canvas_w_s = VIDEO_WIDTH * scale
+    canvas_h_s = VIDEO_HEIGHT * scale
+
+    # Text metrics do not depend on the target image, so lay out with a 1x1 scratch draw
+    text_draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
     
     # Load fonts at scaled size
     en_font_scaled = load_font(en_font_path_resolved, style.en_font_size * scale)
@@ -80,47 +127,103 @@ def render_caption_frame(
     box_height_s = content_height_s + (style.box_padding * scale) * 2
     
     # Position box
-    box_left_s = (VIDEO_WIDTH * scale - box_width_s) // 2
-    box_top_s = int(VIDEO_HEIGHT * scale * style.box_y_ratio) - box_height_s // 2
+    box_left_s = (canvas_w_s - box_width_s) // 2
+    box_top_s = int(canvas_h_s * style.box_y_ratio) - box_height_s // 2
     box_right_s = box_left_s + box_width_s
     box_bottom_s = box_top_s + box_height_s
-    
-    # Draw Box (Scaled)
-    _draw_rounded_rectangle_with_shadow(
-        text_layer,
-        (box_left_s, box_top_s, box_right_s, box_bottom_s),
-        radius=style.box_radius * scale,
-        opacity=style.box_opacity,
-        shadow_offset=style.shadow_offset * scale,
-        shadow_blur_radius=style.shadow_blur_radius * scale,
-    )
-    
+
+    # Place text lines: (x, y, line, font) in full-canvas scaled coordinates
+    placed: List[Tuple[int, int, str, ImageFont.FreeTypeFont]] = []
     current_y_s = box_top_s + (style.box_padding * scale)
     
-    # Draw English (Scaled)
+    # English (Scaled)
     for line in en_lines_scaled:
         bbox = text_draw.textbbox((0, 0), line, font=en_font_scaled)
         w = bbox[2] - bbox[0]
         h = bbox[3] - bbox[1]
-        x = (VIDEO_WIDTH * scale) // 2 - w // 2
-        text_draw.text((x, current_y_s), line, font=en_font_scaled, fill=(0, 0, 0, 255))
+        x = canvas_w_s // 2 - w // 2
+        placed.append((x, current_y_s, line, en_font_scaled))
         current_y_s += h + (style.line_spacing * scale)
 
     current_y_s += (style.line_spacing * scale) + (10 * scale)
 
-    # Draw Urdu (Scaled)
+    # Urdu (Scaled)
     for line in ur_lines_scaled:
         bbox = text_draw.textbbox((0, 0), line, font=ur_font_scaled)
         w = bbox[2] - bbox[0]
         h = bbox[3] - bbox[1]
-        x = (VIDEO_WIDTH * scale) // 2 - w // 2
-        # Lighter stroke for better readability
-        stroke_w = 0  # No stroke for lighter appearance
-        text_draw.text((x, current_y_s), line, font=ur_font_scaled, fill=(0, 0, 0, 255), stroke_width=stroke_w, stroke_fill=(0,0,0,255))
+        x = canvas_w_s // 2 - w // 2
+        placed.append((x, current_y_s, line, ur_font_scaled))
         current_y_s += h + (style.line_spacing * scale)
-        
+
+    # Region of interest: box, blurred shadow and text ink, plus enough empty margin
+    # that the blur and the LANCZOS kernel see the same zeros as on a full-frame layer.
+    # Its origin is snapped to the supersampling grid so the downscale lines up exactly.
+    shadow_reach = style.shadow_offset * scale + 3 * shadow_blur_radius * scale
+    margin = shadow_reach + 4 * scale
+    roi_left = box_left_s - margin
+    roi_top = box_top_s - margin
+    roi_right = box_right_s + margin
+    roi_bottom = box_bottom_s + margin
+    for x, y, line, font in placed:
+        ink = text_draw.textbbox((x, y), line, font=font)
+        roi_left = min(roi_left, ink[0] - 4 * scale)
+        roi_top = min(roi_top, ink[1] - 4 * scale)
+        roi_right = max(roi_right, ink[2] + 4 * scale)
+        roi_bottom = max(roi_bottom, ink[3] + 4 * scale)
+    roi_left = max(0, roi_left - roi_left % scale)
+    roi_top = max(0, roi_top - roi_top % scale)
+    roi_right = min(canvas_w_s, roi_right + (-roi_right) % scale)
+    roi_bottom = min(canvas_h_s, roi_bottom + (-roi_bottom) % scale)
+    if roi_right <= roi_left or roi_bottom <= roi_top:
+        return img.convert("RGB")
+
+    text_layer = Image.new("RGBA", (roi_right - roi_left, roi_bottom - roi_top), (0, 0, 0, 0))
+    layer_draw = ImageDraw.Draw(text_layer)
+
+    # Draw Box (Scaled)
+    box_params = dict(
+        radius=style.box_radius * scale,
+        opacity=style.box_opacity,
+        shadow_offset=style.shadow_offset * scale,
+        shadow_blur_radius=shadow_blur_radius * scale,
+    )
+    sprite_left = box_left_s - margin
+    sprite_top = box_top_s - margin
+    if (
+        sprite_left >= 0
+        and sprite_top >= 0
+        and box_right_s + margin <= canvas_w_s
+        and box_bottom_s + margin <= canvas_h_s
+    ):
+        # Box sizes repeat across segments, so reuse the blurred sprite
+        sprite = _box_sprite(box_width_s, box_height_s, pad=margin, **box_params)
+        text_layer.alpha_composite(sprite, dest=(sprite_left - roi_left, sprite_top - roi_top))
+    else:
+        # The blur would be clipped at the frame edge; draw it in place
+        _draw_rounded_rectangle_with_shadow(
+            text_layer,
+            (box_left_s - roi_left, box_top_s - roi_top, box_right_s - roi_left, box_bottom_s - roi_top),
+            **box_params,
+        )
+
+    # Lighter stroke for better readability
+    stroke_w = 0  # No stroke for lighter appearance
+    for x, y, line, font in placed:
+        layer_draw.text(
+            (x - roi_left, y - roi_top),
+            line,
+            font=font,
+            fill=(0, 0, 0, 255),
+            stroke_width=stroke_w,
+            stroke_fill=(0, 0, 0, 255),
+        )
+
     # Downscale and composite
-    text_layer_resized = text_layer.resize((VIDEO_WIDTH, VIDEO_HEIGHT), resample=Image.LANCZOS)
-    img.alpha_composite(text_layer_resized)
+    if scale > 1:
+        text_layer = text_layer.resize(
+            (text_layer.width // scale, text_layer.height // scale), resample=Image.LANCZOS
+        )
+    img.alpha_composite(text_layer, dest=(roi_left // scale, roi_top // scale))
 
     return img.convert("RGB")
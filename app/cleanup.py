@@ -1,7 +1,16 @@
 import os
 import shutil
 import glob
-from typing import Optional
+import tempfile
+import time
+import uuid
+from contextvars import ContextVar
+from typing import IO, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: workspaces are only told apart by age
+    fcntl = None
 
 
 # Temp directory structure
@@ -9,94 +18,320 @@ TEMP_ROOT = "temp"
 TEMP_AUDIO_DIR = os.path.join(TEMP_ROOT, "audio")
 TEMP_IMAGES_DIR = os.path.join(TEMP_ROOT, "images")
 TEMP_SCRIPTS_DIR = os.path.join(TEMP_ROOT, "scripts")
+TEMP_VIDEO_DIR = os.path.join(TEMP_ROOT, "video")
+
+# Per-build workspaces are directories named ws-<id> under TEMP_ROOT (and
+# under TEMP_RAM_ROOT for the RAM-backed part)
+WORKSPACE_PREFIX = "ws-"
+_WORKSPACE_LOCK_NAME = ".lock"
+
+# tmpfs home for small intermediates (speech, caption frames, list files);
+# encoded video chunks always stay on disk
+TEMP_RAM_ROOT = "/dev/shm/translation_video_generator"
+TEMP_RAM_KINDS = ("audio", "images", "scripts")
+# Fall back to disk when tmpfs has less free space than this
+TEMP_RAM_MIN_FREE_BYTES = 256 * 1024 * 1024
+
+# Janitor limits: idle workspaces older than this are removed, then the
+# oldest idle ones until each temp root fits its quota
+WORKSPACE_MAX_AGE_SECONDS = 6 * 3600
+TEMP_QUOTA_BYTES = 8 * 1024 * 1024 * 1024
+TEMP_RAM_QUOTA_BYTES = 1024 * 1024 * 1024
+
+_KIND_DIRS = {
+    "audio": TEMP_AUDIO_DIR,
+    "images": TEMP_IMAGES_DIR,
+    "scripts": TEMP_SCRIPTS_DIR,
+    "video": TEMP_VIDEO_DIR,
+}
+
+_CURRENT_WORKSPACE: ContextVar[Optional["Workspace"]] = ContextVar("current_workspace", default=None)
+
+
+def _ram_root_available() -> bool:
+    try:
+        os.makedirs(TEMP_RAM_ROOT, exist_ok=True)
+        return shutil.disk_usage(TEMP_RAM_ROOT).free >= TEMP_RAM_MIN_FREE_BYTES
+    except OSError:
+        return False
+
+
+class Workspace:
+    """
+    Private temp directories for one build.
+
+    While a workspace is active (inside ``with Workspace():`` or after
+    activate()), get_temp_*_path hands out paths inside it, so concurrent
+    builds never share or delete each other's files. Leaving the with block
+    removes the workspace unless keep is set.
+
+    Args:
+        ram: Put audio, image and script intermediates on tmpfs
+            (TEMP_RAM_ROOT) when it is available with enough free space
+        keep: Leave the files behind on exit (the janitor removes them later)
+    """
+
+    def __init__(self, ram: bool = False, keep: bool = False) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.root = os.path.abspath(os.path.join(TEMP_ROOT, WORKSPACE_PREFIX + self.id))
+        self.ram_root = (
+            os.path.join(TEMP_RAM_ROOT, WORKSPACE_PREFIX + self.id) if ram and _ram_root_available() else None
+        )
+        self.keep = keep
+        self.dirs: Dict[str, str] = {
+            kind: os.path.join(self.ram_root if self.ram_root and kind in TEMP_RAM_KINDS else self.root, kind)
+            for kind in _KIND_DIRS
+        }
+        self._owner = True
+        self._lock_file = None
+        self._token = None
+
+    @classmethod
+    def attach(cls, dirs: Dict[str, str]) -> "Workspace":
+        """A non-owning handle on another process's workspace (for pool workers)."""
+        ws = cls.__new__(cls)
+        ws.id = None
+        ws.root = os.path.dirname(dirs["video"])
+        ws.ram_root = None
+        ws.keep = True
+        ws.dirs = dict(dirs)
+        ws._owner = False
+        ws._lock_file = None
+        ws._token = None
+        return ws
+
+    def ensure_dirs(self) -> None:
+        for path in self.dirs.values():
+            os.makedirs(path, exist_ok=True)
+
+    def path(self, kind: str, suffix: str) -> str:
+        """A fresh, empty file in this workspace's kind ("audio", "images", "scripts", "video") dir."""
+        directory = self.dirs[kind]
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+        os.close(fd)
+        return path
+
+    def activate(self) -> "Workspace":
+        """Make this the workspace for the current context; owners also create and lock it."""
+        if self._owner and self._lock_file is None:
+            # Held while the workspace is in use so the janitor skips it
+            os.makedirs(self.root, exist_ok=True)
+            self._lock_file = open(os.path.join(self.root, _WORKSPACE_LOCK_NAME), "w")
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self.ensure_dirs()
+        self._token = _CURRENT_WORKSPACE.set(self)
+        return self
+
+    def close(self) -> None:
+        if self._token is not None:
+            _CURRENT_WORKSPACE.reset(self._token)
+            self._token = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        if self._owner and not self.keep:
+            self.remove()
+
+    def remove(self) -> None:
+        for root in (self.root, self.ram_root):
+            if root:
+                shutil.rmtree(root, ignore_errors=True)
+
+    def __enter__(self) -> "Workspace":
+        return self.activate()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def current_workspace() -> Optional[Workspace]:
+    return _CURRENT_WORKSPACE.get()
+
+
+def _lock_idle_workspace(path: str) -> Tuple[bool, Optional[IO]]:
+    """
+    Take the lock of the workspace at path without blocking.
+
+    Returns (idle, lock file): idle is False while a live build holds the
+    lock. The lock file, if any, must stay open until the caller is done
+    with the workspace.
+    """
+    lock_path = os.path.join(path, _WORKSPACE_LOCK_NAME)
+    if fcntl is None:
+        return True, None
+    try:
+        f = open(lock_path, "r")
+    except OSError:
+        return True, None  # never activated, or already removed
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False, None
+    return True, f
+
+
+def _tree_usage(path: str) -> Tuple[int, float]:
+    """Total file bytes under path and the newest mtime in it."""
+    size = 0
+    newest = os.lstat(path).st_mtime
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            size += st.st_size
+            newest = max(newest, st.st_mtime)
+    return size, newest
+
+
+def janitor(
+    max_age_seconds: float = WORKSPACE_MAX_AGE_SECONDS,
+    quota_bytes: int = TEMP_QUOTA_BYTES,
+    ram_quota_bytes: int = TEMP_RAM_QUOTA_BYTES,
+    verbose: bool = False,
+) -> List[str]:
+    """
+    Remove workspaces left behind by finished or crashed builds.
+
+    Workspaces still in use (locked by a live build) are never touched. Idle
+    ones are removed once untouched for max_age_seconds, then the least
+    recently used until the disk and RAM temp roots fit their quotas. Each
+    workspace is locked, and its age and size measured again, before it is
+    removed, so a build that starts using it meanwhile keeps it. Where
+    workspaces cannot be locked (no fcntl, e.g. Windows), ones younger than
+    max_age_seconds may belong to a live build and are kept even over quota.
+
+    Returns:
+        The removed workspace directories
+    """
+    removed: List[str] = []
+    for base, quota in ((TEMP_ROOT, quota_bytes), (TEMP_RAM_ROOT, ram_quota_bytes)):
+        # First pass without locks, only to order the candidates
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(base, WORKSPACE_PREFIX + "*")):
+            try:
+                size, newest = _tree_usage(path)
+            except OSError:
+                continue
+            total += size
+            entries.append((newest, size, path))
+
+        # Without locks a recent workspace may be in use, so only age counts
+        enforce_quota = fcntl is not None
+        for first_newest, size, path in sorted(entries):
+            # Workspaces only get newer, so the rest are fresh too
+            if time.time() - first_newest < max_age_seconds and (total <= quota or not enforce_quota):
+                break
+            # The RAM half of a workspace is locked through its disk half
+            idle, lock_file = _lock_idle_workspace(os.path.join(TEMP_ROOT, os.path.basename(path)))
+            if not idle:
+                continue
+            try:
+                try:
+                    current_size, newest = _tree_usage(path)
+                except OSError:
+                    total -= size  # removed meanwhile
+                    continue
+                total += current_size - size
+                if time.time() - newest < max_age_seconds and (total <= quota or not enforce_quota):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= current_size
+                removed.append(path)
+                if verbose:
+                    print(f"Removed workspace {path} ({current_size} bytes)")
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
+    return removed
 
 
 def ensure_temp_dirs() -> None:
-    """Create temp directory structure if it doesn't exist."""
+    """Create the temp directories (the active workspace's, if any)."""
+    ws = current_workspace()
+    if ws is not None:
+        ws.ensure_dirs()
+        return
     os.makedirs(TEMP_AUDIO_DIR, exist_ok=True)
     os.makedirs(TEMP_IMAGES_DIR, exist_ok=True)
     os.makedirs(TEMP_SCRIPTS_DIR, exist_ok=True)
+    os.makedirs(TEMP_VIDEO_DIR, exist_ok=True)
 
 
 def cleanup_temp(keep_root: bool = False, verbose: bool = False) -> None:
     """
-    Clean up all temporary files after video generation.
-    
+    Clean up temporary files after video generation.
+
+    Inside a workspace only that workspace's files are removed. Outside one,
+    the shared temp directories are cleared and the janitor runs over the
+    workspaces; workspaces of builds still running are left alone.
+
     Args:
-        keep_root: If True, keeps the temp directory structure but removes files
+        keep_root: If True, keeps the directory structure but removes files
         verbose: If True, prints cleanup information
-    
+
     Note:
         This function safely removes temp files without affecting
         generated videos in the main directory.
     """
-    if not os.path.isdir(TEMP_ROOT):
-        if verbose:
-            print(f"Temp directory '{TEMP_ROOT}' does not exist, nothing to clean.")
-        return
-    
-    try:
-        if keep_root:
-            # Remove files but keep directory structure
-            file_count = 0
-            for subdir in [TEMP_AUDIO_DIR, TEMP_IMAGES_DIR, TEMP_SCRIPTS_DIR]:
-                if os.path.isdir(subdir):
-                    for file in glob.glob(os.path.join(subdir, "*")):
-                        if os.path.isfile(file):
-                            try:
-                                os.remove(file)
-                                file_count += 1
-                            except Exception as e:
-                                if verbose:
-                                    print(f"Could not remove {file}: {e}")
-            
-            # Also clean root temp directory
-            for file in glob.glob(os.path.join(TEMP_ROOT, "*")):
-                if os.path.isfile(file):
-                    try:
-                        os.remove(file)
-                        file_count += 1
-                    except Exception as e:
-                        if verbose:
-                            print(f"Could not remove {file}: {e}")
-            
-            if verbose:
-                print(f"Cleaned {file_count} temp files.")
-        else:
-            # Remove entire temp directory
-            shutil.rmtree(TEMP_ROOT)
-            if verbose:
-                print(f"Removed temp directory: {TEMP_ROOT}")
-                
-    except Exception as e:
-        if verbose:
-            print(f"Cleanup error: {e}")
-        # Silently fail - don't crash the application
+    ws = current_workspace()
+    if ws is not None:
+        subdirs = list(ws.dirs.values())
+    else:
+        subdirs = [TEMP_AUDIO_DIR, TEMP_IMAGES_DIR, TEMP_SCRIPTS_DIR, TEMP_VIDEO_DIR]
 
+    file_count = 0
+    for subdir in subdirs:
+        if not os.path.isdir(subdir):
+            continue
+        if not keep_root:
+            shutil.rmtree(subdir, ignore_errors=True)
+            continue
+        for file in glob.glob(os.path.join(subdir, "*")):
+            if os.path.isfile(file):
+                try:
+                    os.remove(file)
+                    file_count += 1
+                except Exception as e:
+                    if verbose:
+                        print(f"Could not remove {file}: {e}")
+    if verbose and keep_root:
+        print(f"Cleaned {file_count} temp files.")
 
-def get_temp_audio_path(suffix: str = "_audio.mp3") -> str:
-    """Get a unique temp path for audio files."""
-    import tempfile
+    if ws is None:
+        janitor(verbose=verbose)
+
+
+def _temp_path(kind: str, suffix: str) -> str:
+    ws = current_workspace()
+    if ws is not None:
+        return ws.path(kind, suffix)
     ensure_temp_dirs()
-    fd, path = tempfile.mkstemp(suffix=suffix, dir=TEMP_AUDIO_DIR)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=_KIND_DIRS[kind])
     os.close(fd)
     return path
 
 
+def get_temp_audio_path(suffix: str = "_audio.mp3") -> str:
+    """Get a unique temp path for audio files."""
+    return _temp_path("audio", suffix)
+
+
 def get_temp_image_path(suffix: str = "_image.jpg") -> str:
     """Get a unique temp path for image files."""
-    import tempfile
-    ensure_temp_dirs()
-    fd, path = tempfile.mkstemp(suffix=suffix, dir=TEMP_IMAGES_DIR)
-    os.close(fd)
-    return path
+    return _temp_path("images", suffix)
 
 
 def get_temp_script_path(suffix: str = "_script.json") -> str:
     """Get a unique temp path for script files."""
-    import tempfile
-    ensure_temp_dirs()
-    fd, path = tempfile.mkstemp(suffix=suffix, dir=TEMP_SCRIPTS_DIR)
-    os.close(fd)
-    return path
+    return _temp_path("scripts", suffix)
+
 
+def get_temp_video_path(suffix: str = "_video.mp4") -> str:
+    """Get a unique temp path for intermediate video files."""
+    return _temp_path("video", suffix)
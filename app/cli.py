@@ -1,20 +1,43 @@
 import argparse
 import os
+import sys
+from dataclasses import replace
+from typing import List, Optional
 
-from .video_composer import build_video
-from .cleanup import cleanup_temp
+from .batch import load_jobs, run_batch
+from .config import DEFAULT_TTS_CONFIG, ENCODER_PROFILES
+from .tracing import Tracer
+from .tts_backends import available_backends
+from .video_composer import ENCODERS, build_video
+from .cleanup import Workspace, janitor
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Urdu-English vertical video generator")
-    parser.add_argument("script", help="Path to JSON script file with [{en, ur}] pairs")
-    parser.add_argument("--output", "-o", default="output.mp4", help="Output video file path")
+def _add_render_options(parser: argparse.ArgumentParser) -> None:
+    """Options shared by single renders and the batch subcommand."""
     parser.add_argument("--background", "-b", help="Optional background image path")
+    parser.add_argument("--bgm", help="Optional background music file")
+    parser.add_argument(
+        "--bgm-volume",
+        type=float,
+        default=0.1,
+        help="Background music volume (0.1 = 10%%)",
+    )
+    parser.add_argument(
+        "--bgm-duck",
+        type=float,
+        default=1.0,
+        help="Extra music gain while voice plays, e.g. 0.4 (1.0 = no ducking)",
+    )
     parser.add_argument(
         "--no-cleanup",
         action="store_true",
         help="Do not delete temp files after rendering",
     )
+    parser.add_argument(
+        "--ram-temp",
+        action="store_true",
+        help="Keep speech, frame and list intermediates on tmpfs (/dev/shm) when available",
+    )
     parser.add_argument(
         "--english-font",
         help="Explicit path to English font file (.ttf/.otf)",
@@ -23,26 +46,199 @@ def main() -> None:
         "--urdu-font",
         help="Explicit path to Urdu font file (.ttf/.otf)",
     )
+    parser.add_argument(
+        "--tts-backend",
+        choices=available_backends(),
+        default=DEFAULT_TTS_CONFIG.backend,
+        help="Speech synthesis backend ('offline' needs no network)",
+    )
+    parser.add_argument(
+        "--encoder",
+        choices=ENCODERS,
+        default="moviepy",
+        help="Video encoding path ('ffmpeg' encodes still frames directly and is much faster)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(ENCODER_PROFILES),
+        help=(
+            "Encoder profile (default: 'balanced' for moviepy; for ffmpeg the profile picked by "
+            "'calibrate', else 'still'; 'draft' with --draft)"
+        ),
+    )
+    parser.add_argument(
+        "--draft",
+        action="store_true",
+        help="Quick preview: half resolution, 12 fps, fast preset, simplified captions",
+    )
+    parser.add_argument(
+        "--no-segment-cache",
+        action="store_true",
+        help="Re-render every segment instead of reusing cached chunks (ffmpeg encoder)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Render segment by segment with bounded memory via ffmpeg (default for .jsonl scripts)",
+    )
+
+
+def _build_kwargs(args: argparse.Namespace) -> dict:
+    return dict(
+        english_font_path=args.english_font,
+        urdu_font_path=args.urdu_font,
+        tts_config=replace(DEFAULT_TTS_CONFIG, backend=args.tts_backend),
+        encoder=args.encoder,
+        segment_cache=not args.no_segment_cache,
+        draft=args.draft,
+        profile=args.profile,
+        stream=True if args.stream else None,
+    )
+
+
+def batch_main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="app.cli batch",
+        description="Render many scripts in one pool of worker processes",
+    )
+    parser.add_argument(
+        "source",
+        help="JSON manifest [{script, output, background, bgm, bgm_volume}] or a directory of scripts",
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-d",
+        help="Directory for outputs not named in the manifest (default: next to the source)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of videos rendered in parallel (encoder threads are split between them)",
+    )
+    _add_render_options(parser)
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(
+        args.source,
+        output_dir=args.output_dir,
+        defaults={
+            "background": args.background,
+            "bgm": args.bgm,
+            "bgm_volume": args.bgm_volume,
+            "bgm_duck": args.bgm_duck,
+        },
+    )
+    if not jobs:
+        print(f"[info] No scripts found in {args.source}")
+        return
+
+    print(f"[info] Rendering {len(jobs)} videos with {args.jobs} workers...")
+    janitor()
+    summary = run_batch(
+        jobs,
+        workers=args.jobs,
+        log=print,
+        ram_temp=args.ram_temp,
+        keep_temp=args.no_cleanup,
+        **_build_kwargs(args),
+    )
+
+    failed = len(summary.results) - summary.succeeded
+    print(
+        f"[info] {summary.succeeded}/{len(summary.results)} videos in {summary.wall_seconds:.1f}s "
+        f"({summary.videos_per_hour:.1f} videos/hour)"
+    )
+    if failed:
+        raise SystemExit(1)
+
+
+def calibrate_main(argv: Optional[List[str]] = None) -> None:
+    from .calibration import calibrate
+
+    parser = argparse.ArgumentParser(
+        prog="app.cli calibrate",
+        description=(
+            "Time each encoder profile on this machine and record the fastest at a target quality "
+            "as the default for the ffmpeg encoder"
+        ),
+    )
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=list(ENCODER_PROFILES),
+        help="Profiles to time (default: all)",
+    )
+    parser.add_argument("--seconds", type=float, default=4.0, help="Length of the synthetic clip")
+    parser.add_argument("--target-psnr", type=float, default=40.0, help="Minimum quality in dB")
+    args = parser.parse_args(argv)
+
+    with Workspace():
+        record = calibrate(args.profiles, args.seconds, args.target_psnr, log=print)
+    if record["fastest"]:
+        print(
+            f"[info] Fastest profile at >= {args.target_psnr} dB: {record['fastest']} "
+            "(now the default for the ffmpeg encoder)"
+        )
+    else:
+        print(f"[info] No profile reached {args.target_psnr} dB")
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["batch"]:
+        batch_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["calibrate"]:
+        calibrate_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="Urdu-English vertical video generator")
+    parser.add_argument("script", help="Path to JSON script file with [{en, ur}] pairs, or JSONL with one per line")
+    parser.add_argument("--output", "-o", default="output.mp4", help="Output video file path")
+    _add_render_options(parser)
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=1,
+        help="Render segments in a process pool of this many workers",
+    )
+    parser.add_argument(
+        "--trace",
+        help="Write a per-stage timing trace (Chrome trace-event JSON, open in Perfetto) to this path",
+    )
 
     args = parser.parse_args()
 
     def _log(msg: str) -> None:
         print(msg)
 
+    tracer = Tracer() if args.trace else None
+
     print("[info] Starting video build...")
+    janitor()
+    workspace = Workspace(ram=args.ram_temp, keep=args.no_cleanup)
     try:
-        build_video(
-            script_path=args.script,
-            output_path=args.output,
-            background_path=args.background,
-            english_font_path=args.english_font,
-            urdu_font_path=args.urdu_font,
-            log=_log,
-        )
+        with workspace:
+            build_video(
+                script_path=args.script,
+                output_path=args.output,
+                background_path=args.background,
+                bgm_path=args.bgm,
+                bgm_volume=args.bgm_volume,
+                bgm_duck=args.bgm_duck,
+                log=_log,
+                workers=args.workers,
+                trace=tracer,
+                **_build_kwargs(args),
+            )
         print(f"[info] Video written to {args.output}")
+        if args.no_cleanup:
+            print(f"[info] Temp files kept in {workspace.root}")
     finally:
-        if not args.no_cleanup:
-            cleanup_temp()
+        if tracer is not None:
+            tracer.export(args.trace)
+            print(f"[info] Trace written to {args.trace}")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,17 @@
+import os
 from dataclasses import dataclass
+from typing import Dict, Optional
 
 
 VIDEO_WIDTH = 1080
 VIDEO_HEIGHT = 1920
 FPS = 24
 
+# Persistent caches (survive cleanup_temp)
+CACHE_ROOT = "cache"
+SEGMENT_CACHE_DIR = os.path.join(CACHE_ROOT, "segments")
+SEGMENT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
 
 @dataclass
 class CaptionStyle:
@@ -23,11 +30,77 @@ class CaptionStyle:
 DEFAULT_CAPTION_STYLE = CaptionStyle()
 
 
+@dataclass
+class RenderSettings:
+    # Output frame size and rate; captions are laid out at VIDEO_WIDTH x
+    # VIDEO_HEIGHT and scaled to this size
+    width: int = VIDEO_WIDTH
+    height: int = VIDEO_HEIGHT
+    fps: int = FPS
+    # Simplified caption effects: no supersampling, unblurred shadow
+    draft: bool = False
+
+
+DEFAULT_RENDER_SETTINGS = RenderSettings()
+
+# Quick previews for checking timing and layout before the final render
+DRAFT_RENDER_SETTINGS = RenderSettings(
+    width=VIDEO_WIDTH // 2,
+    height=VIDEO_HEIGHT // 2,
+    fps=12,
+    draft=True,
+)
+
+
+@dataclass
+class EncoderProfile:
+    name: str
+    codec: str = "libx264"
+    preset: str = "medium"
+    # Constant rate factor; None keeps the codec default (23 for x264)
+    crf: Optional[int] = None
+    tune: Optional[str] = None
+    # Encoder threads; None uses every available core
+    threads: Optional[int] = None
+    audio_codec: str = "aac"
+    audio_bitrate: Optional[str] = None
+
+
+ENCODER_PROFILES: Dict[str, EncoderProfile] = {
+    profile.name: profile
+    for profile in (
+        EncoderProfile("draft", preset="ultrafast", crf=30),
+        EncoderProfile("balanced", preset="medium"),
+        EncoderProfile("archival", preset="slow", crf=18, audio_bitrate="192k"),
+        # Caption videos are held stills with fades, which x264 can tune for
+        EncoderProfile("still", preset="medium", tune="stillimage"),
+    )
+}
+
+# Profile used when none is chosen, per encoding path (draft renders use
+# "draft"); a calibrated profile replaces the ffmpeg default
+DEFAULT_ENCODER_PROFILES: Dict[str, str] = {"moviepy": "balanced", "ffmpeg": "still"}
+
+# Results of 'python -m app.cli calibrate'
+ENCODER_CALIBRATION_PATH = os.path.join(CACHE_ROOT, "encoder_calibration.json")
+
+
 @dataclass
 class TTSConfig:
+    # Synthesis backend registered in app.tts_backends ("edge" or "offline")
+    backend: str = "edge"
     # Edge TTS voices - using proper language-specific voices
     english_voice: str = "en-US-AvaMultilingualNeural"  # Female voice for English
     urdu_voice: str = "ur-PK-AsadNeural"  # Male voice for Urdu (Pakistan)
+    # On-disk cache of synthesized audio; set cache_dir to None to disable
+    cache_dir: str | None = os.path.join(CACHE_ROOT, "tts")
+    cache_max_bytes: int = 512 * 1024 * 1024
+    # Maximum in-flight requests when synthesizing a whole script
+    max_concurrency: int = 8
+    # Offline backend: deterministic tone whose length scales with the text
+    offline_seconds_per_char: float = 0.06
+    offline_sample_rate: int = 24000
+    offline_latency: float = 0.0  # simulated per-request latency (seconds)
 
 
 DEFAULT_TTS_CONFIG = TTSConfig()
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+_META_NAME = "meta.json"
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable content key from JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_size(path: str) -> int:
+    """Size recorded in an entry's sidecar (0 if it has none)."""
+    try:
+        with open(os.path.join(path, _META_NAME), "r", encoding="utf-8") as f:
+            return int(json.load(f).get("size", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+class DiskCache:
+    """
+    Content-addressed on-disk cache with a byte budget and LRU eviction.
+
+    Each entry is a directory holding one or more files plus a ``meta.json``
+    sidecar. The sidecar is written last, so an entry without it is treated
+    as incomplete. Its mtime doubles as the last-access time for eviction,
+    which keeps the cache safe to share between processes without a
+    separate index file.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def file_path(self, key: str, name: str) -> str:
+        return os.path.join(self.entry_dir(key), name)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry's metadata and mark it as recently used, or None on a miss."""
+        meta_path = self.file_path(key, _META_NAME)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for name in meta.get("files", []):
+            if not os.path.isfile(self.file_path(key, name)):
+                return None
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return meta
+
+    def put(
+        self,
+        key: str,
+        files: Dict[str, str],
+        meta: Optional[Dict[str, Any]] = None,
+        move: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Store files under key.
+
+        Args:
+            key: Cache key (see make_key)
+            files: Mapping of entry file name to source path
+            meta: Extra JSON-serialisable metadata stored with the entry
+            move: Move the source files instead of copying them
+
+        Returns:
+            The stored metadata (the existing entry's, if key is already stored)
+        """
+        existing = self.get(key)
+        if existing is not None:
+            return existing
+
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging, exist_ok=True)
+        size = 0
+        try:
+            for name, src in files.items():
+                dst = os.path.join(staging, name)
+                if move:
+                    shutil.move(src, dst)
+                else:
+                    shutil.copyfile(src, dst)
+                size += os.path.getsize(dst)
+
+            stored = dict(meta or {})
+            stored["files"] = sorted(files)
+            stored["size"] = size
+            with open(os.path.join(staging, _META_NAME), "w", encoding="utf-8") as f:
+                json.dump(stored, f, ensure_ascii=False)
+
+            final = self.entry_dir(key)
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            existing = self.get(key)
+            if existing is not None:
+                # Stored meanwhile by another writer; readers may be using it
+                return existing
+            replaced = 0
+            if os.path.isdir(final):
+                # An incomplete leftover (no sidecar or missing files)
+                replaced = _entry_size(final)
+                shutil.rmtree(final, ignore_errors=True)
+            try:
+                os.replace(staging, final)
+            except OSError:
+                # Another process stored the same key first; keep theirs.
+                return self.get(key) or stored
+        finally:
+            if os.path.isdir(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+
+        if self._total_bytes is not None:
+            self._total_bytes += size - replaced
+        self._maybe_evict()
+        return stored
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries: List[Tuple[float, int, str]] = []
+        if not os.path.isdir(self.root):
+            return entries
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if shard.startswith(".") or not os.path.isdir(shard_dir):
+                continue
+            for key in os.listdir(shard_dir):
+                meta_path = os.path.join(shard_dir, key, _META_NAME)
+                try:
+                    last_used = os.path.getmtime(meta_path)
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        size = int(json.load(f).get("size", 0))
+                except (OSError, ValueError):
+                    continue
+                entries.append((last_used, size, os.path.join(shard_dir, key)))
+        return entries
+
+    def _maybe_evict(self) -> None:
+        if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits its budget."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _last_used, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        self._total_bytes = 0
+
+
+def _load_array(cache: DiskCache, key: str, name: str) -> Optional[np.ndarray]:
+    if cache.get(key) is None:
+        return None
+    try:
+        return np.load(cache.file_path(key, name), mmap_mode="r")
+    except FileNotFoundError:
+        return None  # evicted since the lookup
+
+
+def cached_array(
+    cache: DiskCache,
+    key: str,
+    name: str,
+    compute: Callable[[], np.ndarray],
+    memo: Dict[str, np.ndarray],
+    max_items: int,
+    meta: Optional[Dict[str, Any]] = None,
+) -> np.ndarray:
+    """
+    Array for key, computed at most once across processes.
+
+    The array is stored in cache as the .npy file name and memory-mapped
+    from there; memo keeps up to max_items arrays per process (oldest
+    dropped first). An array too large for the cache's whole budget is
+    kept in memory only.
+    """
+    array = memo.get(key)
+    if array is not None:
+        return array
+
+    array = _load_array(cache, key, name)
+    if array is None:
+        computed = compute()
+        fd, tmp = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+        try:
+            np.save(tmp, computed)
+            cache.put(key, {name: tmp}, meta, move=True)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        array = _load_array(cache, key, name)
+        if array is None:
+            array = computed
+
+    if len(memo) >= max_items:
+        memo.pop(next(iter(memo)))
+    memo[key] = array
+    return array
@@ -0,0 +1,134 @@
+import os
+import subprocess
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from .config import FPS
+
+
+@dataclass
+class StillSegment:
+    """One caption frame held on screen for a number of video frames."""
+
+    image_path: str
+    frames: int
+    fade: float = 0.5
+
+
+def ffmpeg_binary() -> str:
+    """The ffmpeg executable MoviePy is configured to use."""
+    from moviepy.config import get_setting
+
+    return get_setting("FFMPEG_BINARY")
+
+
+def run_ffmpeg(args: List[str]) -> None:
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y"] + args
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        err = proc.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed ({proc.returncode}): {err[-1000:]}")
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def frames_for_duration(duration: float, fps: int = FPS) -> int:
+    """Whole number of video frames for a segment (at least one)."""
+    return max(1, int(round(duration * fps)))
+
+
+def encode_still_segment(
+    segment: StillSegment,
+    out_path: str,
+    fps: int = FPS,
+    codec: str = "libx264",
+    preset: str = "medium",
+    threads: Optional[int] = None,
+    crf: Optional[int] = None,
+    tune: Optional[str] = None,
+) -> str:
+    """
+    Encode a still image with fade in/out to a video-only chunk.
+
+    The image is decoded once and repeated by the loop filter; only the fade
+    windows produce changing frames, and the identical hold frames compress
+    to near-empty P-frames (especially with tune="stillimage").
+    """
+    duration = segment.frames / fps
+    fade = min(segment.fade, duration)
+    filters = [
+        f"loop=loop={segment.frames - 1}:size=1:start=0",
+        f"setpts=N/{fps}/TB",
+    ]
+    if fade > 0:
+        filters.append(f"fade=t=in:st=0:d={fade:.6f}")
+        filters.append(f"fade=t=out:st={max(0.0, duration - fade):.6f}:d={fade:.6f}")
+    filters.append("format=yuv420p")
+
+    args = [
+        "-i", segment.image_path,
+        "-vf", ",".join(filters),
+        "-frames:v", str(segment.frames),
+        "-r", str(fps),
+        "-an",
+        "-c:v", codec,
+        "-preset", preset,
+    ]
+    if crf is not None:
+        args += ["-crf", str(crf)]
+    if tune:
+        args += ["-tune", tune]
+    if threads:
+        args += ["-threads", str(threads)]
+    run_ffmpeg(args + [out_path])
+    return out_path
+
+
+def concat_list_entry(path: str) -> str:
+    """One line of a concat demuxer list file."""
+    escaped = os.path.abspath(path).replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+
+def concat_from_list(list_path: str, out_path: str) -> str:
+    """Join the chunks named in a concat list file (stream copy)."""
+    run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", out_path])
+    return out_path
+
+
+def concat_segments(paths: Sequence[str], out_path: str) -> str:
+    """Join identically encoded chunks with the concat demuxer (stream copy)."""
+    from .cleanup import get_temp_script_path
+
+    list_path = get_temp_script_path(suffix="_concat.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            f.write(concat_list_entry(path))
+    return concat_from_list(list_path, out_path)
+
+
+def mux_audio(
+    video_path: str,
+    audio_path: str,
+    out_path: str,
+    audio_codec: str = "aac",
+    audio_bitrate: Optional[str] = None,
+) -> str:
+    """Copy the video stream and encode audio_path alongside it."""
+    args = [
+        "-i", video_path,
+        "-i", audio_path,
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-c:v", "copy",
+        "-c:a", audio_codec,
+    ]
+    if audio_bitrate:
+        args += ["-b:a", audio_bitrate]
+    run_ffmpeg(args + ["-shortest", "-movflags", "+faststart", out_path])
+    return out_path
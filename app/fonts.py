@@ -1,8 +1,11 @@
 import json
 import os
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Tuple
 from PIL import ImageFont
 
+from .config import CACHE_ROOT
+
 
 PREFERRED_FONTS_URDU: List[str] = [
     "Arial", # User confirmed this works for Urdu rendering
@@ -21,6 +24,16 @@ PREFERRED_FONTS_EN: List[str] = [
 
 _FONTS_CONFIG_CACHE: Optional[Dict[str, Any]] = None
 
+# Persistent index of discovered fonts and their family names
+FONT_INDEX_PATH = os.path.join(CACHE_ROOT, "fonts_index.json")
+_FONT_INDEX_VERSION = 1
+_FONT_INDEX_CACHE: Optional[List[Tuple[str, str]]] = None
+# Per-directory scan entries behind _FONT_INDEX_CACHE, rechecked on each use
+_FONT_INDEX_DIRS: Dict[str, Any] = {}
+
+# Loaded FreeTypeFont objects keyed by (path, size)
+_LOADED_FONTS_CACHE_SIZE = 32
+
 
 def _load_fonts_config() -> Dict[str, Any]:
     global _FONTS_CONFIG_CACHE
@@ -38,36 +51,118 @@ def _load_fonts_config() -> Dict[str, Any]:
     return _FONTS_CONFIG_CACHE
 
 
-def _candidate_font_paths() -> List[str]:
-    candidates: List[str] = []
+def _font_search_dirs() -> List[str]:
+    search_dirs: List[str] = []
 
     # 1) Project-local fonts directory (preferred if present)
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     local_fonts_dir = os.path.join(project_root, "fonts")
-    search_dirs: List[str] = []
     if os.path.isdir(local_fonts_dir):
         search_dirs.append(local_fonts_dir)
 
     # 2) System fonts (Windows)
     windows_dir = os.environ.get("WINDIR", "C:\\Windows")
     search_dirs.append(os.path.join(windows_dir, "Fonts"))
+    return search_dirs
+
+
+def _read_family_name(path: str) -> str:
+    try:
+        family, _style = ImageFont.truetype(path, size=12).getname()
+        return family or ""
+    except Exception:
+        return ""
+
+
+def _scan_font_dir(base: str) -> Dict[str, Any]:
+    """Walk base for font files, reading each file's family name once."""
+    mtimes: Dict[str, float] = {}
+    fonts: List[List[str]] = []
+    for root, _dirs, files in os.walk(base):
+        mtimes[root] = os.path.getmtime(root)
+        for f in files:
+            if f.lower().endswith((".ttf", ".otf")):
+                path = os.path.join(root, f)
+                fonts.append([path, _read_family_name(path)])
+    return {"mtimes": mtimes, "fonts": fonts}
 
+
+def _dir_entry_is_fresh(entry: Dict[str, Any]) -> bool:
+    for d, mtime in entry.get("mtimes", {}).items():
+        try:
+            if os.path.getmtime(d) != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _load_font_index() -> List[Tuple[str, str]]:
+    """
+    Return (path, family name) for every font in the search dirs.
+
+    The index is kept on disk and in process, and reused while the mtimes
+    of all scanned directories are unchanged, so font files are only opened
+    on a rescan. The mtimes are re-checked on every call, so long-lived
+    processes pick up fonts installed after they started.
+    """
+    global _FONT_INDEX_CACHE, _FONT_INDEX_DIRS
+    search_dirs = [base for base in _font_search_dirs() if os.path.isdir(base)]
+    if (
+        _FONT_INDEX_CACHE is not None
+        and set(search_dirs) == set(_FONT_INDEX_DIRS)
+        and all(_dir_entry_is_fresh(entry) for entry in _FONT_INDEX_DIRS.values())
+    ):
+        return _FONT_INDEX_CACHE
+
+    stored: Dict[str, Any] = {}
+    try:
+        with open(FONT_INDEX_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == _FONT_INDEX_VERSION:
+            stored = data.get("dirs", {})
+    except (OSError, ValueError):
+        pass
+
+    dirs: Dict[str, Any] = {}
+    changed = False
     for base in search_dirs:
-        if os.path.isdir(base):
-            for root, _dirs, files in os.walk(base):
-                for f in files:
-                    if f.lower().endswith((".ttf", ".otf")):
-                        candidates.append(os.path.join(root, f))
-    return candidates
+        entry = stored.get(base)
+        if entry is None or not _dir_entry_is_fresh(entry):
+            entry = _scan_font_dir(base)
+            changed = True
+        dirs[base] = entry
+
+    if changed or set(dirs) != set(stored):
+        try:
+            os.makedirs(os.path.dirname(FONT_INDEX_PATH), exist_ok=True)
+            tmp_path = f"{FONT_INDEX_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": _FONT_INDEX_VERSION, "dirs": dirs}, f, ensure_ascii=False)
+            os.replace(tmp_path, FONT_INDEX_PATH)
+        except OSError:
+            pass  # the index is only an optimisation
+
+    _FONT_INDEX_DIRS = dirs
+    _FONT_INDEX_CACHE = [
+        (path, family) for entry in dirs.values() for path, family in entry["fonts"]
+    ]
+    return _FONT_INDEX_CACHE
+
+
+def _candidate_font_paths() -> List[str]:
+    return [path for path, _family in _load_font_index()]
 
 
 def _find_font_by_preferred_names(preferred: List[str]) -> Optional[str]:
-    candidates = _candidate_font_paths()
-    lower_map = {os.path.basename(p).lower(): p for p in candidates}
+    index = [
+        (os.path.basename(path).lower(), family.lower(), path)
+        for path, family in _load_font_index()
+    ]
     for name in preferred:
         name_lower = name.lower()
-        for base, full in lower_map.items():
-            if name_lower in base:
+        for base, family, full in index:
+            if name_lower in family or name_lower in base:
                 return full
     return None
 
@@ -82,12 +177,12 @@ def get_urdu_font_path(override_path: Optional[str] = None) -> Optional[str]:
     path = _find_font_by_preferred_names(PREFERRED_FONTS_URDU)
     if path:
         return path
-    candidates = _candidate_font_paths()
-    for p in candidates:
-        base = os.path.basename(p).lower()
-        if any(tag in base for tag in ["arab", "urdu", "naskh", "nastaliq"]):
+    index = _load_font_index()
+    for p, family in index:
+        names = (os.path.basename(p) + " " + family).lower()
+        if any(tag in names for tag in ["arab", "urdu", "naskh", "nastaliq"]):
             return p
-    for p in candidates:
+    for p, _family in index:
         base = os.path.basename(p).lower()
         if "arial" in base:
             return p
@@ -104,18 +199,23 @@ def get_english_font_path(override_path: Optional[str] = None) -> Optional[str]:
     path = _find_font_by_preferred_names(PREFERRED_FONTS_EN)
     if path:
         return path
-    candidates = _candidate_font_paths()
-    for p in candidates:
+    for p in _candidate_font_paths():
         base = os.path.basename(p).lower()
         if "arial" in base:
             return p
     return None
 
 
+@lru_cache(maxsize=_LOADED_FONTS_CACHE_SIZE)
+def _load_font_cached(path: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(path, size=size)
+
+
 def load_font(path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
+    """Load a font, reusing the parsed FreeTypeFont for repeated (path, size) pairs."""
     if path and os.path.isfile(path):
         try:
-            return ImageFont.truetype(path, size=size)
+            return _load_font_cached(path, size)
         except Exception as exc:
             raise RuntimeError(f"Failed to load font at {path}: {exc}") from exc
     else:
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import shutil
+from dataclasses import asdict
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from .config import (
+    CaptionStyle,
+    TTSConfig,
+    SEGMENT_CACHE_DIR,
+    SEGMENT_CACHE_MAX_BYTES,
+)
+from .disk_cache import DiskCache, make_key
+from .tts_layer import tts_cache_key
+
+
+# Bump when segment rendering or encoding changes in a way the key cannot see
+_SEGMENT_CACHE_VERSION = 1
+
+_SEGMENT_CACHE: Optional[DiskCache] = None
+
+
+def get_segment_cache() -> DiskCache:
+    global _SEGMENT_CACHE
+    if _SEGMENT_CACHE is None:
+        _SEGMENT_CACHE = DiskCache(SEGMENT_CACHE_DIR, SEGMENT_CACHE_MAX_BYTES)
+    return _SEGMENT_CACHE
+
+
+def file_fingerprint(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Cheap identity for an input file: resolved path, size and mtime."""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {"path": os.path.abspath(path)}
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def image_digest(img: Image.Image) -> str:
+    """Content hash of a decoded image (used for the prepared background)."""
+    digest = hashlib.sha256()
+    digest.update(f"{img.mode}:{img.size}".encode("ascii"))
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+def segment_cache_key(
+    pair: Dict[str, Any],
+    style: CaptionStyle,
+    english_font_path: Optional[str],
+    urdu_font_path: Optional[str],
+    background_digest: str,
+    tts_config: TTSConfig,
+    encoder_settings: Dict[str, Any],
+) -> str:
+    """
+    Key for one encoded segment chunk (video + audio).
+
+    Covers everything that changes the chunk: the pair's text and timing
+    fields, caption style, font files, background, the TTS identity of both
+    lines and the encoder settings.
+    """
+    return make_key(
+        _SEGMENT_CACHE_VERSION,
+        pair.get("en", ""),
+        pair.get("ur", ""),
+        pair.get("pause_after"),
+        pair.get("min_duration"),
+        asdict(style),
+        file_fingerprint(english_font_path),
+        file_fingerprint(urdu_font_path),
+        background_digest,
+        tts_cache_key(pair.get("en", ""), tts_config.english_voice, tts_config),
+        tts_cache_key(pair.get("ur", ""), tts_config.urdu_voice, tts_config),
+        encoder_settings,
+    )
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """Hard-link src to dst (so later eviction cannot pull it away), copying across devices."""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+    return dst
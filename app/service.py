@@ -0,0 +1,487 @@
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import signal
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from .cleanup import WORKSPACE_MAX_AGE_SECONDS
+from .config import DEFAULT_TTS_CONFIG, ENCODER_PROFILES
+from .ffmpeg_encoder import available_cores
+from .tts_backends import available_backends
+
+
+# Per-job directories holding the submitted script, assets and result
+SERVICE_DATA_DIR = "service_jobs"
+
+# Finished jobs (and their directories) are dropped this long after they end,
+# the same age the janitor gives idle temp workspaces
+SERVICE_JOB_RETENTION_SECONDS = WORKSPACE_MAX_AGE_SECONDS
+_PRUNE_INTERVAL_SECONDS = 60
+# How often the listener checks that the worker processes are still alive
+_WORKER_CHECK_SECONDS = 2
+
+# Largest accepted request body (script plus base64 assets)
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{32})(/result)?$")
+
+
+@dataclass
+class JobStatus:
+    """What GET /jobs/<id> reports for one job."""
+
+    id: str
+    status: str = "queued"  # queued, running, done, failed
+    progress: float = 0.0
+    stage: str = "queued"
+    error: Optional[str] = None
+    created: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+
+def _number_field(request: Dict[str, Any], name: str, default: float) -> float:
+    value = request.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"'{name}' must be a number")
+    return float(value)
+
+
+def _bool_field(request: Dict[str, Any], name: str, default: bool) -> bool:
+    value = request.get(name, default)
+    if not isinstance(value, bool):
+        raise ValueError(f"'{name}' must be true or false")
+    return value
+
+
+def _check_script(script: Any) -> None:
+    if not isinstance(script, list) or not script:
+        raise ValueError("'script' must be a non-empty list of {en, ur} objects")
+    for i, pair in enumerate(script):
+        if not isinstance(pair, dict) or not all(isinstance(pair.get(k), str) for k in ("en", "ur")):
+            raise ValueError(f"'script' entry {i} must be an object with string 'en' and 'ur'")
+        pause = pair.get("pause_after")
+        if pause is not None and (isinstance(pause, bool) or not isinstance(pause, (int, float))):
+            raise ValueError(f"'script' entry {i}: 'pause_after' must be a number")
+
+
+def _worker_loop(
+    jobs: multiprocessing.Queue, events: multiprocessing.Queue, ram_temp: bool, threads: int
+) -> None:
+    """
+    Worker process: render jobs until a None sentinel arrives.
+
+    The process lives for the whole service, so its in-process caches (fonts,
+    shaped text, decoded music) stay warm from one job to the next. Each job
+    renders in its own temp workspace, encoding with its share (threads) of
+    the cores.
+    """
+    from .cleanup import Workspace, janitor
+    from .video_composer import build_video
+
+    # Shutdown is driven by the parent's sentinels, not the terminal's Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job_id = job["id"]
+        events.put(("running", job_id, os.getpid()))
+
+        def _progress(fraction: float, stage: str) -> None:
+            events.put(("progress", job_id, (fraction, stage)))
+
+        try:
+            # Clear out workspaces of jobs a crashed worker left behind
+            janitor()
+            with Workspace(ram=ram_temp):
+                build_video(
+                    script_path=job["script_path"],
+                    output_path=job["output_path"],
+                    background_path=job.get("background_path"),
+                    bgm_path=job.get("bgm_path"),
+                    bgm_volume=job["bgm_volume"],
+                    bgm_duck=job["bgm_duck"],
+                    tts_config=replace(DEFAULT_TTS_CONFIG, backend=job["tts_backend"]),
+                    encoder=job["encoder"],
+                    progress=_progress,
+                    draft=job["draft"],
+                    profile=job["profile"],
+                    threads=threads,
+                )
+            events.put(("done", job_id, None))
+        except Exception as e:
+            events.put(("failed", job_id, f"{type(e).__name__}: {e}"))
+
+
+class RenderService:
+    """
+    Job queue in front of a fixed pool of render worker processes.
+
+    Submitted jobs are written to their own directory under data_dir and put
+    on a multiprocessing queue; a listener thread applies the workers'
+    status and progress events to the in-memory job table. A worker that
+    dies (e.g. killed for running out of memory) fails its current job and
+    is replaced. Finished jobs are forgotten and their directories deleted
+    retention_seconds after they end.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        data_dir: str = SERVICE_DATA_DIR,
+        encoder: str = "ffmpeg",
+        tts_backend: str = DEFAULT_TTS_CONFIG.backend,
+        ram_temp: bool = False,
+        retention_seconds: float = SERVICE_JOB_RETENTION_SECONDS,
+    ) -> None:
+        self.data_dir = data_dir
+        self.retention_seconds = retention_seconds
+        self.encoder = encoder
+        self.tts_backend = tts_backend
+        self._jobs: Dict[str, JobStatus] = {}
+        self._lock = threading.Lock()
+        self._job_queue: multiprocessing.Queue = multiprocessing.Queue()
+        self._events: multiprocessing.Queue = multiprocessing.Queue()
+        workers = max(1, workers)
+        self._ram_temp = ram_temp
+        # Split the cores between the workers rather than each encoder using all of them
+        self._threads = max(1, available_cores() // workers)
+        self._workers: List[multiprocessing.Process] = [self._new_worker() for _ in range(workers)]
+        # Worker pid -> id of the job it is rendering
+        self._running: Dict[int, str] = {}
+        self._stopping = False
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+
+    def _new_worker(self) -> multiprocessing.Process:
+        return multiprocessing.Process(
+            target=_worker_loop,
+            args=(self._job_queue, self._events, self._ram_temp, self._threads),
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._remove_stale_dirs()
+        for proc in self._workers:
+            proc.start()
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Let workers finish their current job, then stop them and the listener."""
+        self._stopping = True
+        for _ in self._workers:
+            self._job_queue.put(None)
+        for proc in self._workers:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        self._events.put(None)
+        self._listener.join(timeout=5)
+
+    def _listen(self) -> None:
+        next_prune = time.monotonic() + _PRUNE_INTERVAL_SECONDS
+        while True:
+            try:
+                event = self._events.get(timeout=_WORKER_CHECK_SECONDS)
+            except queue.Empty:
+                event = ()
+            if event is None:
+                return
+            if event:
+                self._apply_event(*event)
+            self._check_workers()
+            if time.monotonic() >= next_prune:
+                self.prune()
+                next_prune = time.monotonic() + _PRUNE_INTERVAL_SECONDS
+
+    def _check_workers(self) -> None:
+        """Fail the job of any worker that died mid-render and start a replacement."""
+        if self._stopping:
+            return
+        for i, proc in enumerate(self._workers):
+            if proc.is_alive():
+                continue
+            with self._lock:
+                job_id = self._running.pop(proc.pid, None)
+                job = self._jobs.get(job_id) if job_id else None
+                if job is not None and job.finished is None:
+                    job.status = job.stage = "failed"
+                    job.error = f"Worker process exited unexpectedly (exit code {proc.exitcode})"
+                    job.finished = time.time()
+            replacement = self._new_worker()
+            replacement.start()
+            self._workers[i] = replacement
+
+    def _apply_event(self, kind: str, job_id: str, payload: Any) -> None:
+        with self._lock:
+            if kind == "running":
+                if payload not in {proc.pid for proc in self._workers}:
+                    # The worker died (and was replaced) before this event was read
+                    kind, payload = "failed", "Worker process exited unexpectedly"
+                else:
+                    self._running[payload] = job_id
+            if kind in ("done", "failed"):
+                self._running = {pid: j for pid, j in self._running.items() if j != job_id}
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if kind == "running":
+                job.status = job.stage = "running"
+                job.started = time.time()
+            elif kind == "progress" and job.finished is None:
+                job.progress, job.stage = payload
+            elif kind == "done":
+                job.status = job.stage = "done"
+                job.progress = 1.0
+                job.finished = time.time()
+            elif kind == "failed":
+                job.status = job.stage = "failed"
+                job.error = payload
+                job.finished = time.time()
+
+    def prune(self) -> List[str]:
+        """Drop finished jobs older than the retention period and delete their directories."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished is not None and job.finished < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return expired
+
+    def _remove_stale_dirs(self) -> None:
+        # Jobs from an earlier run are no longer in the table; remove their
+        # directories once they are past the retention period
+        cutoff = time.time() - self.retention_seconds
+        for name in os.listdir(self.data_dir):
+            path = self.job_dir(name)
+            try:
+                if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.data_dir, job_id)
+
+    def result_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir(job_id), "output.mp4")
+
+    def submit(self, request: Dict[str, Any]) -> JobStatus:
+        """
+        Queue a render job.
+
+        Args:
+            request: {"script": [{en, ur}, ...]} plus optional "background" and
+                "bgm" assets as {"filename", "data" (base64)} and the options
+                "bgm_volume", "bgm_duck", "encoder", "tts_backend", "draft"
+                and "profile"
+
+        Returns:
+            The new job's status
+        """
+        script = request.get("script")
+        _check_script(script)
+        from .video_composer import ENCODERS
+
+        tts_backend = request.get("tts_backend", self.tts_backend)
+        if not isinstance(tts_backend, str) or tts_backend not in available_backends():
+            raise ValueError(f"Unknown TTS backend {tts_backend!r}")
+        encoder = request.get("encoder", self.encoder)
+        if not isinstance(encoder, str) or encoder not in ENCODERS:
+            raise ValueError(f"Unknown encoder {encoder!r}")
+        profile = request.get("profile")
+        if profile is not None and (not isinstance(profile, str) or profile not in ENCODER_PROFILES):
+            raise ValueError(f"Unknown encoder profile {profile!r}")
+
+        self.prune()
+        job_id = uuid.uuid4().hex
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir)
+        try:
+            script_path = os.path.join(job_dir, "script.json")
+            with open(script_path, "w", encoding="utf-8") as f:
+                json.dump(script, f, ensure_ascii=False)
+            job = {
+                "id": job_id,
+                "script_path": script_path,
+                "output_path": self.result_path(job_id),
+                "background_path": self._save_asset(job_dir, "background", request.get("background")),
+                "bgm_path": self._save_asset(job_dir, "bgm", request.get("bgm")),
+                "bgm_volume": _number_field(request, "bgm_volume", 0.1),
+                "bgm_duck": _number_field(request, "bgm_duck", 1.0),
+                "encoder": encoder,
+                "tts_backend": tts_backend,
+                "draft": _bool_field(request, "draft", False),
+                "profile": profile,
+            }
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        status = JobStatus(id=job_id, created=time.time())
+        with self._lock:
+            self._jobs[job_id] = status
+        self._job_queue.put(job)
+        return status
+
+    @staticmethod
+    def _save_asset(job_dir: str, name: str, asset: Optional[Dict[str, str]]) -> Optional[str]:
+        if not asset:
+            return None
+        try:
+            data = base64.b64decode(asset["data"], validate=True)
+            ext = os.path.splitext(os.path.basename(str(asset.get("filename") or "")))[1].lower()
+        except Exception:
+            raise ValueError(f"'{name}' must be {{filename, data}} with base64 data")
+        path = os.path.join(job_dir, name + ext)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job is not None else None
+
+    def list_jobs(self) -> List[JobStatus]:
+        with self._lock:
+            return [replace(job) for job in self._jobs.values()]
+
+
+def _make_handler(service: RenderService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send_json(self, code: int, payload: Any) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0 or length > MAX_REQUEST_BYTES:
+                self._send_json(413 if length > 0 else 400, {"error": "invalid request size"})
+                return
+            try:
+                request = json.loads(self.rfile.read(length).decode("utf-8"))
+                if not isinstance(request, dict):
+                    raise ValueError("request body must be a JSON object")
+                job = service.submit(request)
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(202, asdict(job))
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/jobs":
+                self._send_json(200, [asdict(job) for job in service.list_jobs()])
+                return
+            match = _JOB_PATH.match(self.path)
+            job = service.status(match.group(1)) if match else None
+            if job is None:
+                self._send_json(404, {"error": "unknown job"})
+                return
+            if not match.group(2):
+                self._send_json(200, asdict(job))
+                return
+            if job.status != "done":
+                self._send_json(409, {"error": f"job is {job.status}"})
+                return
+            path = service.result_path(job.id)
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.send_header("Content-Disposition", f'attachment; filename="{job.id}.mp4"')
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    return Handler
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int = 1,
+    data_dir: str = SERVICE_DATA_DIR,
+    encoder: str = "ffmpeg",
+    tts_backend: str = DEFAULT_TTS_CONFIG.backend,
+    ram_temp: bool = False,
+) -> None:
+    """Run the render service until interrupted."""
+    from .cleanup import janitor
+
+    service = RenderService(workers, data_dir, encoder, tts_backend, ram_temp)
+    service.start()
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+
+    def _terminate(signum, frame) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    print(f"[info] Render service on http://{host}:{server.server_address[1]} with {workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        janitor()
+
+
+def main() -> None:
+    from .video_composer import ENCODERS
+
+    parser = argparse.ArgumentParser(description="Local HTTP render job service")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of render worker processes",
+    )
+    parser.add_argument("--data-dir", default=SERVICE_DATA_DIR, help="Directory for job inputs and outputs")
+    parser.add_argument("--encoder", choices=ENCODERS, default="ffmpeg", help="Default encoder for jobs")
+    parser.add_argument(
+        "--tts-backend",
+        choices=available_backends(),
+        default=DEFAULT_TTS_CONFIG.backend,
+        help="Default speech synthesis backend for jobs",
+    )
+    parser.add_argument(
+        "--ram-temp",
+        action="store_true",
+        help="Keep speech, frame and list intermediates on tmpfs (/dev/shm) when available",
+    )
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.data_dir, args.encoder, args.tts_backend, args.ram_temp)
+
+
+if __name__ == "__main__":
+    main()
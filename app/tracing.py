@@ -0,0 +1,140 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Tracer that span() records into; None when tracing is off
+_CURRENT_TRACER: ContextVar[Optional["Tracer"]] = ContextVar("current_tracer", default=None)
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+        except ImportError:
+            return 0
+
+
+def _child_cpu_seconds() -> float:
+    """CPU time of finished child processes (ffmpeg runs), which process_time() misses."""
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class Tracer:
+    """
+    Collects spans as Chrome trace-event "complete" events.
+
+    Timestamps come from time.perf_counter, which is system-wide monotonic,
+    so events recorded in worker processes can be merged in with add_events.
+    """
+
+    def __init__(self) -> None:
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, cat: str = "build", **args: Any) -> Iterator[None]:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        child_start = _child_cpu_seconds()
+        rss_start = rss_bytes()
+        try:
+            yield
+        finally:
+            wall_end = time.perf_counter()
+            rss_end = rss_bytes()
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": wall_start * 1e6,
+                "dur": (wall_end - wall_start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {
+                    **args,
+                    "cpu_ms": round((time.process_time() - cpu_start) * 1000, 3),
+                    "child_cpu_ms": round((_child_cpu_seconds() - child_start) * 1000, 3),
+                    "rss_mib": round(rss_end / (1 << 20), 2),
+                    "rss_delta_kib": round((rss_end - rss_start) / 1024, 1),
+                },
+            }
+            with self._lock:
+                self._events.append(event)
+
+    def add_events(self, events: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._events.extend(events)
+
+    def events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._events)
+
+    def totals(self) -> Dict[str, float]:
+        """Total wall seconds per span name."""
+        totals: Dict[str, float] = {}
+        for event in self.events():
+            totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1e6
+        return totals
+
+    def export(self, path: str) -> str:
+        """Write a trace viewable in chrome://tracing or Perfetto."""
+        events = sorted(self.events(), key=lambda e: e["ts"])
+        origin = events[0]["ts"] if events else 0.0
+        trace_events = [dict(e, ts=round(e["ts"] - origin, 3), dur=round(e["dur"], 3)) for e in events]
+        for pid in sorted({e["pid"] for e in events}):
+            trace_events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "args": {"name": "build_video" if pid == os.getpid() else f"render worker {pid}"},
+                }
+            )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+@contextmanager
+def tracing(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """Make tracer the target of span() for the enclosed block (None disables)."""
+    token = _CURRENT_TRACER.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _CURRENT_TRACER.reset(token)
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _CURRENT_TRACER.get()
+
+
+@contextmanager
+def span(name: str, cat: str = "build", **args: Any) -> Iterator[None]:
+    """Record a span into the current tracer; does nothing when tracing is off."""
+    tracer = _CURRENT_TRACER.get()
+    if tracer is None:
+        yield
+        return
+    with tracer.span(name, cat, **args):
+        yield
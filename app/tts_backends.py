@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import wave
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+
+from .config import TTSConfig
+
+
+class TTSBackend:
+    """Base class for speech synthesis backends selected via TTSConfig.backend."""
+
+    name: str = ""
+    # Extension of the files written by synthesize()
+    extension: str = ".mp3"
+
+    def __init__(self, config: TTSConfig) -> None:
+        self.config = config
+
+    async def synthesize(self, text: str, voice: str, out_path: str) -> Optional[float]:
+        """
+        Write speech for text to out_path.
+
+        Returns:
+            The audio duration in seconds if known without decoding, else None
+        """
+        raise NotImplementedError
+
+
+_BACKENDS: Dict[str, Type[TTSBackend]] = {}
+
+
+def register_backend(cls: Type[TTSBackend]) -> Type[TTSBackend]:
+    """Register a backend class under its name (usable as a decorator)."""
+    if not cls.name:
+        raise ValueError(f"TTS backend {cls.__name__} has no name")
+    _BACKENDS[cls.name] = cls
+    return cls
+
+
+def available_backends() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+def get_backend(config: TTSConfig) -> TTSBackend:
+    cls = _BACKENDS.get(config.backend)
+    if cls is None:
+        raise ValueError(
+            f"Unknown TTS backend {config.backend!r}; available: {', '.join(available_backends())}"
+        )
+    return cls(config)
+
+
+@register_backend
+class EdgeTTSBackend(TTSBackend):
+    """Microsoft Edge online TTS."""
+
+    name = "edge"
+    extension = ".mp3"
+
+    async def synthesize(self, text: str, voice: str, out_path: str) -> Optional[float]:
+        import edge_tts
+
+        communicate = edge_tts.Communicate(text, voice=voice)
+        await communicate.save(out_path)
+        return None
+
+
+def _offline_pcm(text: str, voice: str, sample_rate: int, seconds_per_char: float) -> np.ndarray:
+    """Deterministic 16-bit mono 'speech': a tone whose length scales with the text."""
+    digest = hashlib.sha256(f"{voice}\0{text}".encode("utf-8")).digest()
+    pitch = 140.0 + digest[0]  # 140-395 Hz, stable per (voice, text)
+    syllable_rate = 3.0 + digest[1] / 64.0  # 3-7 Hz amplitude modulation
+
+    duration = 0.25 + seconds_per_char * len(text)
+    t = np.arange(int(round(duration * sample_rate)), dtype=np.float64) / sample_rate
+    envelope = 0.5 - 0.5 * np.cos(2 * np.pi * syllable_rate * t)
+    samples = 0.3 * envelope * np.sin(2 * np.pi * pitch * t)
+    return (samples * 32767).astype("<i2")
+
+
+@register_backend
+class OfflineTTSBackend(TTSBackend):
+    """
+    Network-free backend for load testing and air-gapped CI.
+
+    Output depends only on (text, voice, config), and the optional artificial
+    latency stands in for the network round-trip.
+    """
+
+    name = "offline"
+    extension = ".wav"
+
+    async def synthesize(self, text: str, voice: str, out_path: str) -> Optional[float]:
+        if self.config.offline_latency > 0:
+            await asyncio.sleep(self.config.offline_latency)
+        sample_rate = self.config.offline_sample_rate
+        pcm = _offline_pcm(text, voice, sample_rate, self.config.offline_seconds_per_char)
+        with wave.open(out_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm.tobytes())
+        return len(pcm) / sample_rate
@@ -1,10 +1,29 @@
 import asyncio
 import os
-from dataclasses import dataclass
-import edge_tts
+import shutil
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
 from pydub import AudioSegment
 
 from .config import DEFAULT_TTS_CONFIG, TTSConfig
+from .disk_cache import DiskCache, make_key
+from .tts_backends import get_backend
+
+
+# Bump when the stored audio format changes to orphan old cache entries
+_TTS_CACHE_VERSION = 1
+
+# Config fields that do not change the synthesized audio for a given voice
+_CACHE_KEY_EXCLUDED_FIELDS = {
+    "english_voice",
+    "urdu_voice",
+    "cache_dir",
+    "cache_max_bytes",
+    "max_concurrency",
+    "offline_latency",
+}
+
+_TTS_CACHES: Dict[Tuple[str, int], DiskCache] = {}
 
 
 @dataclass
@@ -13,24 +32,134 @@ class TTSAudio:
     duration: float
 
 
-async def _edge_tts_to_file(text: str, voice: str, out_path: str) -> None:
-    """Generate TTS audio using Edge TTS."""
-    communicate = edge_tts.Communicate(text, voice=voice)
-    await communicate.save(out_path)
-
-
 def _measure_audio(path: str) -> float:
     """Measure audio duration in seconds."""
     audio = AudioSegment.from_file(path)
     return audio.duration_seconds
 
 
+def _get_tts_cache(config: TTSConfig) -> Optional[DiskCache]:
+    if not config.cache_dir:
+        return None
+    cache_id = (config.cache_dir, config.cache_max_bytes)
+    cache = _TTS_CACHES.get(cache_id)
+    if cache is None:
+        cache = DiskCache(config.cache_dir, config.cache_max_bytes)
+        _TTS_CACHES[cache_id] = cache
+    return cache
+
+
+def tts_cache_key(text: str, voice: str, config: TTSConfig) -> str:
+    """Content key identifying the audio synthesized for (text, voice, config)."""
+    settings = {
+        k: v for k, v in asdict(config).items() if k not in _CACHE_KEY_EXCLUDED_FIELDS
+    }
+    return make_key(_TTS_CACHE_VERSION, text, voice, settings)
+
+
+async def _synthesize_async(text: str, voice: str, tag: str, config: TTSConfig) -> TTSAudio:
+    """
+    Synthesize text with voice using the configured backend, going through
+    the on-disk TTS cache.
+
+    Cache hits are copied into the temp audio dir so the caller owns its file
+    even if the entry is evicted later; the stored duration means the copy is
+    never decoded. An entry evicted between lookup and copy is synthesized
+    again.
+    """
+    from .cleanup import get_temp_audio_path
+
+    backend = get_backend(config)
+    cache = _get_tts_cache(config)
+    key = tts_cache_key(text, voice, config)
+    audio_name = "audio" + backend.extension
+    tmp = get_temp_audio_path(suffix=tag + backend.extension)
+
+    if cache is not None:
+        meta = cache.get(key)
+        if meta is not None:
+            try:
+                shutil.copyfile(cache.file_path(key, audio_name), tmp)
+                return TTSAudio(path=tmp, duration=float(meta["duration"]))
+            except FileNotFoundError:
+                # Evicted by another process since get(); synthesize it again
+                pass
+
+    duration = await backend.synthesize(text, voice, tmp)
+    if duration is None:
+        # Decoding blocks on ffmpeg; keep the loop free for other requests
+        duration = await asyncio.to_thread(_measure_audio, tmp)
+
+    if cache is not None:
+        cache.put(key, {audio_name: tmp}, {"duration": duration})
+    return TTSAudio(path=tmp, duration=duration)
+
+
+def _synthesize(text: str, voice: str, tag: str, config: TTSConfig) -> TTSAudio:
+    return asyncio.run(_synthesize_async(text, voice, tag, config))
+
+
+async def synthesize_script_async(
+    segments: Sequence[Dict[str, str]],
+    config: TTSConfig = DEFAULT_TTS_CONFIG,
+    concurrency: Optional[int] = None,
+) -> List[Tuple[TTSAudio, TTSAudio]]:
+    """
+    Synthesize the English and Urdu lines of every segment concurrently.
+
+    Identical (text, voice) requests within the script are only synthesized
+    once and share the resulting TTSAudio.
+
+    Args:
+        segments: Script entries with "en" and "ur" keys
+        config: TTS configuration with voice settings
+        concurrency: Maximum number of in-flight requests
+            (defaults to config.max_concurrency)
+
+    Returns:
+        One (english, urdu) TTSAudio pair per segment, in script order
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency or config.max_concurrency))
+    tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def _limited(text: str, voice: str, tag: str) -> TTSAudio:
+        async with semaphore:
+            return await _synthesize_async(text, voice, tag, config)
+
+    def _task(text: str, voice: str, tag: str) -> asyncio.Task:
+        task = tasks.get((text, voice))
+        if task is None:
+            task = asyncio.ensure_future(_limited(text, voice, tag))
+            tasks[(text, voice)] = task
+        return task
+
+    pairs = [
+        (
+            _task(pair.get("en", ""), config.english_voice, "_en"),
+            _task(pair.get("ur", ""), config.urdu_voice, "_ur"),
+        )
+        for pair in segments
+    ]
+    await asyncio.gather(*tasks.values())
+    return [(en.result(), ur.result()) for en, ur in pairs]
+
+
+def synthesize_script(
+    segments: Sequence[Dict[str, str]],
+    config: TTSConfig = DEFAULT_TTS_CONFIG,
+    concurrency: Optional[int] = None,
+) -> List[Tuple[TTSAudio, TTSAudio]]:
+    """Blocking wrapper around synthesize_script_async on a single event loop."""
+    return asyncio.run(synthesize_script_async(segments, config, concurrency))
+
+
 def generate_english_tts(
     text: str,
     config: TTSConfig = DEFAULT_TTS_CONFIG,
 ) -> TTSAudio:
     """
-    Generate English TTS audio using Edge TTS with female voice (Ava).
+    Generate English TTS audio with the configured backend (Edge TTS,
+    female voice Ava, by default).
     
     Args:
         text: English text to convert to speech
@@ -39,15 +168,7 @@ def generate_english_tts(
     Returns:
         TTSAudio object with path and duration
     """
-    from .cleanup import get_temp_audio_path
-    
-    tmp = get_temp_audio_path(suffix="_en.mp3")
-    
-    # Use Edge TTS with female voice
-    asyncio.run(_edge_tts_to_file(text, config.english_voice, tmp))
-    
-    duration = _measure_audio(tmp)
-    return TTSAudio(path=tmp, duration=duration)
+    return _synthesize(text, config.english_voice, "_en", config)
 
 
 def generate_urdu_tts(
@@ -55,7 +176,8 @@ def generate_urdu_tts(
     config: TTSConfig = DEFAULT_TTS_CONFIG,
 ) -> TTSAudio:
     """
-    Generate Urdu TTS audio using Edge TTS with male voice (Andrew).
+    Generate Urdu TTS audio with the configured backend (Edge TTS,
+    male voice Asad, by default).
     
     Args:
         text: Urdu text to convert to speech
@@ -64,13 +186,5 @@ def generate_urdu_tts(
     Returns:
         TTSAudio object with path and duration
     """
-    from .cleanup import get_temp_audio_path
-    
-    tmp = get_temp_audio_path(suffix="_ur.mp3")
-    
-    # Use Edge TTS with male voice
-    asyncio.run(_edge_tts_to_file(text, config.urdu_voice, tmp))
-    
-    duration = _measure_audio(tmp)
-    return TTSAudio(path=tmp, duration=duration)
+    return _synthesize(text, config.urdu_voice, "_ur", config)
 
@@ -1,18 +1,118 @@
-from typing import List, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Tuple
 
 import arabic_reshaper
 from bidi.algorithm import get_display
 from PIL import ImageFont, ImageDraw
 
 
-def shape_urdu(text: str) -> str:
-    if not text:
-        return ""
+# Bounded LRU of shaped strings: whole captions, wrapped lines and single words
+_SHAPE_CACHE_SIZE = 4096
+_SHAPE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_SHAPE_CACHE_LOCK = threading.Lock()
+
+# Below this many unshaped strings a worker pool costs more than it saves
+_SHAPE_POOL_MIN_BATCH = 64
+
+
+def _shape_uncached(text: str) -> str:
     reshaped = arabic_reshaper.reshape(text)
     bidi_text = get_display(reshaped)
     return bidi_text
 
 
+def _remember_shaped(text: str, shaped: str) -> None:
+    with _SHAPE_CACHE_LOCK:
+        _SHAPE_CACHE[text] = shaped
+        _SHAPE_CACHE.move_to_end(text)
+        while len(_SHAPE_CACHE) > _SHAPE_CACHE_SIZE:
+            _SHAPE_CACHE.popitem(last=False)
+
+
+def shape_urdu(text: str) -> str:
+    if not text:
+        return ""
+    with _SHAPE_CACHE_LOCK:
+        shaped = _SHAPE_CACHE.get(text)
+        if shaped is not None:
+            _SHAPE_CACHE.move_to_end(text)
+            return shaped
+    shaped = _shape_uncached(text)
+    _remember_shaped(text, shaped)
+    return shaped
+
+
+def shape_script(texts: Iterable[str], workers: int = 0) -> List[str]:
+    """
+    Shape a batch of Urdu strings up front and warm the shaping cache.
+
+    Each string's individual words are shaped too, since wrap_text_rtl
+    measures words one at a time.
+
+    Args:
+        texts: Urdu strings, e.g. every "ur" entry of a script
+        workers: Shape in a process pool of this size when > 1 and the
+            batch is large enough to pay for it
+
+    Returns:
+        The shaped strings, in input order
+    """
+    texts = list(texts)
+    pending: List[str] = []
+    seen = set()
+    for text in texts:
+        for item in [text] + text.split(" "):
+            if item and item not in seen:
+                seen.add(item)
+                with _SHAPE_CACHE_LOCK:
+                    if item in _SHAPE_CACHE:
+                        continue
+                pending.append(item)
+
+    if workers > 1 and len(pending) >= _SHAPE_POOL_MIN_BATCH:
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shaped = list(pool.map(_shape_uncached, pending, chunksize=chunksize))
+    else:
+        shaped = [_shape_uncached(item) for item in pending]
+    for item, result in zip(pending, shaped):
+        _remember_shaped(item, result)
+
+    return [shape_urdu(text) for text in texts]
+
+
+def _line_width(text: str, font: ImageFont.FreeTypeFont, draw: ImageDraw.ImageDraw) -> int:
+    bbox = draw.textbbox((0, 0), text, font=font)
+    return bbox[2] - bbox[0]
+
+
+def _fits(
+    estimate: float,
+    max_width: int,
+    tolerance: float,
+    measure: Callable[[], int],
+) -> bool:
+    """
+    Decide whether a candidate line fits in max_width.
+
+    estimate is the sum of per-word advances; it only differs from the shaped
+    line's ink width by side bearings and kerning, so the full measurement is
+    needed only when the estimate is within tolerance of the limit.
+    """
+    if estimate <= max_width - tolerance:
+        return True
+    if estimate > max_width + tolerance:
+        return False
+    return measure() <= max_width
+
+
+def _break_tolerance(font: ImageFont.FreeTypeFont) -> float:
+    # One em comfortably covers side bearings and kerning at a line's ends
+    return float(getattr(font, "size", 0) or 0) or 64.0
+
+
 def wrap_text_rtl(
     text: str,
     font: ImageFont.FreeTypeFont,
@@ -24,28 +124,32 @@ def wrap_text_rtl(
     words = text.split(" ")
     lines: List[str] = []
     current_line_words: List[str] = []
-    
+    current_width = 0.0
+    space_width = font.getlength(" ")
+    tolerance = _break_tolerance(font)
+
     for word in words:
-        # Test with current word added
-        trial_words = current_line_words + [word]
-        # Join, then shape to test width
-        trial_text = " ".join(trial_words)
-        shaped_trial = shape_urdu(trial_text)
-        
-        bbox = draw.textbbox((0, 0), shaped_trial, font=font)
-        w = bbox[2] - bbox[0]
-        
-        if w <= max_width:
+        # Each word is shaped and measured once; widths are accumulated
+        word_width = font.getlength(shape_urdu(word))
+        if current_line_words:
+            estimate = current_width + space_width + word_width
+        else:
+            estimate = word_width
+
+        def _measure_trial() -> int:
+            return _line_width(shape_urdu(" ".join(current_line_words + [word])), font, draw)
+
+        if _fits(estimate, max_width, tolerance, _measure_trial):
             current_line_words.append(word)
+            current_width = estimate
         else:
             if current_line_words:
                 # Shape the completed line and add to lines
                 full_line_text = " ".join(current_line_words)
                 lines.append(shape_urdu(full_line_text))
-                current_line_words = [word]
-            else:
-                # Word itself is too long, just add it (or split char by char if really needed)
-                current_line_words = [word]
+            # Word itself may be too long; it starts a line on its own either way
+            current_line_words = [word]
+            current_width = word_width
                 
     if current_line_words:
         full_line_text = " ".join(current_line_words)
@@ -63,16 +167,25 @@ def wrap_text_ltr(
     words = text.split(" ")
     lines: List[str] = []
     current = ""
+    current_width = 0.0
+    space_width = font.getlength(" ")
+    tolerance = _break_tolerance(font)
     for word in words:
         trial = (current + " " + word).strip()
-        bbox = draw.textbbox((0, 0), trial, font=font)
-        w = bbox[2] - bbox[0]
-        if w <= max_width:
+        if trial == current:
+            estimate = current_width
+        elif current:
+            estimate = current_width + space_width + font.getlength(word)
+        else:
+            estimate = font.getlength(trial)
+        if _fits(estimate, max_width, tolerance, lambda: _line_width(trial, font, draw)):
             current = trial
+            current_width = estimate
         else:
             if current:
                 lines.append(current)
             current = word
+            current_width = font.getlength(word)
     if current:
         lines.append(current)
     return lines
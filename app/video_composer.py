@@ -1,22 +1,100 @@
+import contextlib
+import itertools
 import json
 import os
-from typing import List, Dict, Optional
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple, Union
 
 import numpy as np
+from PIL import Image
 from moviepy.editor import (
     AudioFileClip,
     ImageClip,
-    CompositeAudioClip,
     concatenate_videoclips,
 )
 
-from .backgrounds import prepare_background_image
+from .audio_mixer import (
+    SAMPLE_RATE,
+    SEGMENT_AUDIO_FADE,
+    SegmentAudio,
+    WavAppender,
+    fit_length,
+    mix_segment,
+    mix_timeline,
+    stream_mix_bgm,
+    write_wav,
+)
+from .backgrounds import load_background
+from .calibration import calibrated_profile
 from .caption_renderer import render_caption_frame
-from .config import VIDEO_WIDTH, VIDEO_HEIGHT, FPS
-from .tts_layer import generate_english_tts, generate_urdu_tts
+from .config import (
+    VIDEO_WIDTH,
+    VIDEO_HEIGHT,
+    DEFAULT_CAPTION_STYLE,
+    DEFAULT_RENDER_SETTINGS,
+    DEFAULT_TTS_CONFIG,
+    DEFAULT_ENCODER_PROFILES,
+    DRAFT_RENDER_SETTINGS,
+    ENCODER_PROFILES,
+    EncoderProfile,
+    RenderSettings,
+    TTSConfig,
+)
+from .ffmpeg_encoder import (
+    StillSegment,
+    available_cores,
+    concat_from_list,
+    concat_list_entry,
+    encode_still_segment,
+    frames_for_duration,
+    mux_audio,
+)
+from .fonts import get_english_font_path, get_urdu_font_path
+from .segment_cache import get_segment_cache, image_digest, link_or_copy, segment_cache_key
+from .tracing import Tracer, current_tracer, span, tracing
+from .tts_layer import TTSAudio, synthesize_script
+from .urdu_text import shape_script
+
+
+def _is_jsonl(path: str) -> bool:
+    return path.lower().endswith(".jsonl")
+
+
+def iter_script(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Yield script entries in order.
+
+    A .jsonl script (one {en, ur} object per line) is read a line at a time;
+    a JSON array is loaded whole.
+    """
+    if not _is_jsonl(path):
+        yield from _load_script(path)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                pair = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{lineno}: {e}") from e
+            if not isinstance(pair, dict):
+                raise ValueError(f"{path}:{lineno}: expected an {{en, ur}} object")
+            yield pair
+
+
+def _count_script_entries(path: str) -> int:
+    count = 0
+    for _ in iter_script(path):
+        count += 1
+    return count
 
 
 def _load_script(path: str) -> List[Dict[str, str]]:
+    if _is_jsonl(path):
+        return list(iter_script(path))
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
     if not isinstance(data, list):
@@ -24,6 +102,618 @@ def _load_script(path: str) -> List[Dict[str, str]]:
     return data
 
 
+ENCODERS = ("moviepy", "ffmpeg")
+
+# Silence between the English line and its Urdu translation
+TEACHING_GAP = 0.2
+
+# Video fade in/out at each segment boundary
+VIDEO_FADE = 0.5
+
+# Segments whose speech is synthesized together in a streaming build
+STREAM_WINDOW = 16
+
+
+
+@dataclass
+class SegmentTiming:
+    en_start: float
+    ur_start: float
+    duration: float
+
+
+def _segment_timing(pair: Dict[str, str], en_tts: TTSAudio, ur_tts: TTSAudio) -> SegmentTiming:
+    pause_after = float(pair.get("pause_after", 0.0) or 0.0)
+    min_duration = float(pair.get("min_duration", 0.0) or 0.0)
+
+    en_start = 0.0
+    ur_start = en_tts.duration + TEACHING_GAP
+    total_audio_duration = ur_start + ur_tts.duration + pause_after
+
+    if total_audio_duration < min_duration:
+        total_audio_duration = min_duration
+    return SegmentTiming(en_start=en_start, ur_start=ur_start, duration=total_audio_duration)
+
+
+def _voice_regions(timing: SegmentTiming, en_tts: TTSAudio, ur_tts: TTSAudio) -> List[Tuple[float, float]]:
+    """Where each voice line plays, relative to the segment start."""
+    return [
+        (timing.en_start, timing.en_start + en_tts.duration),
+        (timing.ur_start, timing.ur_start + ur_tts.duration),
+    ]
+
+
+@dataclass
+class SegmentChunk:
+    """An encoded segment: video-only chunk plus its exactly matching audio."""
+
+    video_path: str
+    audio_path: str
+    frames: int
+    voice_regions: List[Tuple[float, float]]
+
+
+def _mix_bgm(
+    voice_path: str,
+    bgm_path: str,
+    bgm_volume: float,
+    bgm_duck: float,
+    voice_regions: List[Tuple[float, float]],
+    log: Optional[callable],
+) -> str:
+    """Stream looped background music under the voice track; falls back to voice only on failure."""
+    from .cleanup import get_temp_audio_path
+
+    try:
+        return stream_mix_bgm(
+            voice_path,
+            bgm_path,
+            get_temp_audio_path(suffix="_track.wav"),
+            volume=bgm_volume,
+            duck=bgm_duck,
+            voice_regions=voice_regions,
+        )
+    except Exception as e:
+        if log:
+            log(f"Warning: Could not add BGM: {e}")
+        # Continue without BGM if there's an error
+        return voice_path
+
+
+def _render_frame(
+    bg_image,
+    pair: Dict[str, str],
+    english_font_path: Optional[str],
+    urdu_font_path: Optional[str],
+    settings: RenderSettings,
+) -> Image.Image:
+    """Caption frame at the output size of settings."""
+    frame_img = render_caption_frame(
+        bg_image,
+        pair,
+        english_font_path=english_font_path,
+        urdu_font_path=urdu_font_path,
+        draft=settings.draft,
+    )
+    if frame_img.size != (settings.width, settings.height):
+        frame_img = frame_img.resize((settings.width, settings.height), Image.BILINEAR)
+    return frame_img
+
+
+def _render_segment_chunk(
+    idx: int,
+    pair: Dict[str, str],
+    en_tts: TTSAudio,
+    ur_tts: TTSAudio,
+    bg_image,
+    english_font_path: Optional[str],
+    urdu_font_path: Optional[str],
+    settings: RenderSettings,
+    profile: EncoderProfile,
+    threads: Optional[int] = None,
+) -> SegmentChunk:
+    """Render, encode and mix one segment on its own, independent of its position."""
+    from .cleanup import get_temp_audio_path, get_temp_image_path, get_temp_video_path
+
+    timing = _segment_timing(pair, en_tts, ur_tts)
+    frames = frames_for_duration(timing.duration, settings.fps)
+
+    with span("render_frame", segment=idx):
+        frame_img = _render_frame(bg_image, pair, english_font_path, urdu_font_path, settings)
+        frame_path = get_temp_image_path(suffix=f"_frame{idx:04d}.png")
+        frame_img.save(frame_path, format="PNG", compress_level=1)
+    with span("encode_segment", segment=idx, frames=frames):
+        video_path = encode_still_segment(
+            StillSegment(image_path=frame_path, frames=frames, fade=VIDEO_FADE),
+            get_temp_video_path(suffix=f"_seg{idx:04d}.mp4"),
+            fps=settings.fps,
+            codec=profile.codec,
+            preset=profile.preset,
+            threads=threads or profile.threads or available_cores(),
+            crf=profile.crf,
+            tune=profile.tune,
+        )
+    os.remove(frame_path)
+
+    # Audio is cut to exactly the chunk's frame count so chunks can be joined blindly
+    with span("mix_segment_audio", segment=idx):
+        samples = mix_segment(
+            SegmentAudio(start=0.0, tracks=[(en_tts.path, timing.en_start), (ur_tts.path, timing.ur_start)])
+        )
+        audio_path = write_wav(
+            fit_length(samples, int(round(frames * SAMPLE_RATE / settings.fps))),
+            get_temp_audio_path(suffix=f"_seg{idx:04d}.wav"),
+        )
+    return SegmentChunk(
+        video_path=video_path,
+        audio_path=audio_path,
+        frames=frames,
+        voice_regions=_voice_regions(timing, en_tts, ur_tts),
+    )
+
+
+# Per-process state of render pool workers, set once by _init_render_worker
+_RENDER_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_render_worker(
+    bg_image,
+    english_font_path: Optional[str],
+    urdu_font_path: Optional[str],
+    settings: RenderSettings,
+    profile: Optional[EncoderProfile],
+    trace: bool,
+    workspace_dirs: Optional[Dict[str, str]],
+) -> None:
+    from .cleanup import Workspace
+
+    # Intermediates go to the parent build's workspace, which it cleans up
+    if workspace_dirs:
+        Workspace.attach(workspace_dirs).activate()
+    _RENDER_WORKER_STATE.update(
+        bg_image=bg_image,
+        english_font_path=english_font_path,
+        urdu_font_path=urdu_font_path,
+        settings=settings,
+        profile=profile,
+        trace=trace,
+    )
+
+
+def _worker_tracer() -> Optional[Tracer]:
+    """A fresh tracer per task when the parent is tracing; its events travel back with the result."""
+    return Tracer() if _RENDER_WORKER_STATE["trace"] else None
+
+
+def _render_frame_task(idx: int, pair: Dict[str, str]) -> Tuple[np.ndarray, List[dict]]:
+    state = _RENDER_WORKER_STATE
+    tracer = _worker_tracer()
+    with tracing(tracer), span("render_frame", segment=idx):
+        frame_img = _render_frame(
+            state["bg_image"],
+            pair,
+            state["english_font_path"],
+            state["urdu_font_path"],
+            state["settings"],
+        )
+        frame = np.array(frame_img)
+    return frame, tracer.events() if tracer else []
+
+
+def _render_chunk_task(
+    idx: int,
+    pair: Dict[str, str],
+    en_tts: TTSAudio,
+    ur_tts: TTSAudio,
+    threads: Optional[int],
+) -> Tuple[SegmentChunk, List[dict]]:
+    state = _RENDER_WORKER_STATE
+    tracer = _worker_tracer()
+    with tracing(tracer), span("segment", segment=idx):
+        chunk = _render_segment_chunk(
+            idx,
+            pair,
+            en_tts,
+            ur_tts,
+            state["bg_image"],
+            state["english_font_path"],
+            state["urdu_font_path"],
+            state["settings"],
+            state["profile"],
+            threads=threads,
+        )
+    return chunk, tracer.events() if tracer else []
+
+
+def _merge_worker_events(events: List[dict]) -> None:
+    tracer = current_tracer()
+    if tracer is not None and events:
+        tracer.add_events(events)
+
+
+def _render_pool(
+    workers: int,
+    bg_image,
+    english_font_path: Optional[str],
+    urdu_font_path: Optional[str],
+    settings: RenderSettings,
+    profile: Optional[EncoderProfile] = None,
+) -> ProcessPoolExecutor:
+    """Process pool whose workers hold the decoded background, font paths and settings."""
+    from .cleanup import current_workspace
+
+    workspace = current_workspace()
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_render_worker,
+        initargs=(
+            bg_image,
+            english_font_path,
+            urdu_font_path,
+            settings,
+            profile,
+            current_tracer() is not None,
+            workspace.dirs if workspace is not None else None,
+        ),
+    )
+
+
+def _chunk_encoder_settings(settings: RenderSettings, profile: EncoderProfile) -> Dict[str, Any]:
+    """Everything about encoding that a cached segment chunk depends on."""
+    return {
+        "fps": settings.fps,
+        "codec": profile.codec,
+        "preset": profile.preset,
+        "crf": profile.crf,
+        "tune": profile.tune,
+        "size": [settings.width, settings.height],
+        "draft": settings.draft,
+        "sample_rate": SAMPLE_RATE,
+        "video_fade": VIDEO_FADE,
+        "audio_fade": SEGMENT_AUDIO_FADE,
+        "teaching_gap": TEACHING_GAP,
+    }
+
+
+def _restore_chunk(cache, key: str, idx: int) -> Optional[SegmentChunk]:
+    """
+    Link a cached segment chunk into temp so it survives eviction while in
+    use; None on a miss, including an entry evicted by another build before
+    its files could be linked.
+    """
+    from .cleanup import get_temp_audio_path, get_temp_video_path
+
+    meta = cache.get(key)
+    if meta is None:
+        return None
+    with span("cache_restore", segment=idx):
+        video_path = get_temp_video_path(suffix=f"_seg{idx:04d}.mp4")
+        audio_path = get_temp_audio_path(suffix=f"_seg{idx:04d}.wav")
+        try:
+            link_or_copy(cache.file_path(key, "video.mp4"), video_path)
+            link_or_copy(cache.file_path(key, "audio.wav"), audio_path)
+        except FileNotFoundError:
+            for path in (video_path, audio_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return None
+        return SegmentChunk(
+            video_path=video_path,
+            audio_path=audio_path,
+            frames=int(meta["frames"]),
+            voice_regions=[tuple(r) for r in meta["voice_regions"]],
+        )
+
+
+def _store_chunk(cache, key: str, chunk: SegmentChunk, idx: int) -> None:
+    with span("cache_store", segment=idx):
+        cache.put(
+            key,
+            {"video.mp4": chunk.video_path, "audio.wav": chunk.audio_path},
+            {"frames": chunk.frames, "voice_regions": chunk.voice_regions},
+        )
+
+
+def _windows(items: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    it = iter(items)
+    while True:
+        window = list(itertools.islice(it, size))
+        if not window:
+            return
+        yield window
+
+
+def _build_chunked(
+    segments: Iterable[Dict[str, str]],
+    total: int,
+    window_size: int,
+    bg_image,
+    output_path: str,
+    english_font_path: Optional[str],
+    urdu_font_path: Optional[str],
+    bgm_path: Optional[str],
+    bgm_volume: float,
+    bgm_duck: float,
+    tts_config: TTSConfig,
+    segment_cache: bool,
+    workers: int,
+    settings: RenderSettings,
+    profile: EncoderProfile,
+    log: Optional[callable],
+    progress: Callable[[float, str], None],
+) -> str:
+    """
+    Render segments as independently encoded chunks and join them.
+
+    segments is consumed window_size entries at a time; each window is
+    looked up in the segment cache, synthesized, rendered and encoded, and
+    its chunks are appended to the concat list and the voice track before
+    the next window is read. Only one window of segments is held in memory.
+    """
+    from .cleanup import get_temp_audio_path, get_temp_script_path, get_temp_video_path
+
+    en_font = get_english_font_path(english_font_path)
+    ur_font = get_urdu_font_path(urdu_font_path)
+
+    cache = get_segment_cache() if segment_cache else None
+    if cache is not None:
+        bg_digest = image_digest(bg_image)
+        encoder_settings = _chunk_encoder_settings(settings, profile)
+
+    # Changed segments are rendered and encoded in a process pool, started
+    # the first time a window has more than one; x264 threads are split
+    # between its workers so the pool does not oversubscribe the machine
+    pool = None
+    threads = None
+    single_window = total <= window_size
+
+    list_path = get_temp_script_path(suffix="_concat.txt")
+    voice_path = get_temp_audio_path(suffix="_voice.wav")
+    voice_regions: List[Tuple[float, float]] = []
+    segment_start = 0.0
+    reused = 0
+    idx = 0
+    try:
+        with open(list_path, "w", encoding="utf-8") as concat_list, WavAppender(voice_path) as voice:
+            for window in _windows(segments, window_size):
+                keys: List[Optional[str]] = [None] * len(window)
+                cached: List[Optional[SegmentChunk]] = [None] * len(window)
+                if cache is not None:
+                    # Hits are linked into the workspace right away, so the
+                    # renders that follow cannot outlast them in the cache
+                    with span("cache_lookup", segments=len(window)):
+                        for j, pair in enumerate(window):
+                            keys[j] = segment_cache_key(
+                                pair, DEFAULT_CAPTION_STYLE, en_font, ur_font, bg_digest, tts_config, encoder_settings
+                            )
+                            cached[j] = _restore_chunk(cache, keys[j], idx + j + 1)
+
+                # Only changed segments need speech and shaping
+                missing = [j for j, chunk in enumerate(cached) if chunk is None]
+                tts_by_index = {}
+                if missing:
+                    progress(0.05 + 0.85 * idx / total, "tts")
+                    if log:
+                        log(f"[tts] Synthesizing {len(missing)} segments...")
+                    with span("tts", segments=len(missing)):
+                        tts_results = synthesize_script([window[j] for j in missing], tts_config)
+                    tts_by_index = dict(zip(missing, tts_results))
+                    with span("shape"):
+                        shape_script(window[j].get("ur", "") for j in missing)
+
+                if pool is None and workers > 1 and len(missing) > 1:
+                    pool_size = min(workers, len(missing) if single_window else min(window_size, total))
+                    pool = _render_pool(pool_size, bg_image, en_font, ur_font, settings, profile)
+                    threads = max(1, (profile.threads or available_cores()) // pool_size)
+                futures: Dict[int, Future] = {}
+                if pool is not None:
+                    for j in missing:
+                        en_tts, ur_tts = tts_by_index[j]
+                        futures[j] = pool.submit(
+                            _render_chunk_task, idx + j + 1, window[j], en_tts, ur_tts, threads
+                        )
+
+                for j, pair in enumerate(window):
+                    idx += 1
+                    progress(0.05 + 0.85 * (idx - 1) / total, "render")
+                    if cached[j] is not None:
+                        if log:
+                            log(f"[segment {idx}/{total}] Reusing cached segment")
+                        chunk = cached[j]
+                        reused += 1
+                    else:
+                        if log:
+                            log(f"[segment {idx}/{total}] Rendering and encoding...")
+                        if j in futures:
+                            chunk, events = futures[j].result()
+                            _merge_worker_events(events)
+                        else:
+                            en_tts, ur_tts = tts_by_index[j]
+                            with span("segment", segment=idx):
+                                chunk = _render_segment_chunk(
+                                    idx, pair, en_tts, ur_tts, bg_image, en_font, ur_font, settings, profile
+                                )
+                        if cache is not None:
+                            _store_chunk(cache, keys[j], chunk, idx)
+
+                    # The video chunk stays on disk for the final concat;
+                    # its audio is folded into the voice track right away
+                    concat_list.write(concat_list_entry(chunk.video_path))
+                    voice.append(chunk.audio_path)
+                    os.remove(chunk.audio_path)
+                    voice_regions += [(segment_start + s, segment_start + e) for s, e in chunk.voice_regions]
+                    segment_start += chunk.frames / settings.fps
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    if log:
+        log(f"[cache] Reused {reused}/{total} segments")
+
+    progress(0.9, "encode")
+    if log:
+        log("[encode] Joining segments...")
+    with span("concat", segments=total):
+        video_only = concat_from_list(list_path, get_temp_video_path(suffix="_concat.mp4"))
+    audio_path = voice_path
+
+    # Add background music if provided
+    if bgm_path:
+        with span("bgm"):
+            audio_path = _mix_bgm(audio_path, bgm_path, bgm_volume, bgm_duck, voice_regions, log)
+
+    with span("mux"):
+        return mux_audio(
+            video_only,
+            audio_path,
+            output_path,
+            audio_codec=profile.audio_codec,
+            audio_bitrate=profile.audio_bitrate,
+        )
+
+
+def _build_with_moviepy(
+    segments: List[Dict[str, str]],
+    bg_image,
+    output_path: str,
+    english_font_path: Optional[str],
+    urdu_font_path: Optional[str],
+    bgm_path: Optional[str],
+    bgm_volume: float,
+    bgm_duck: float,
+    tts_config: TTSConfig,
+    workers: int,
+    settings: RenderSettings,
+    profile: EncoderProfile,
+    log: Optional[callable],
+    progress: Callable[[float, str], None],
+) -> str:
+    from .cleanup import get_temp_audio_path
+
+    progress(0.05, "tts")
+    if log:
+        log(f"[tts] Synthesizing {len(segments)} segments...")
+    with span("tts", segments=len(segments)):
+        tts_results = synthesize_script(segments, tts_config)
+
+    # Shape every Urdu line up front; caption wrapping then hits the cache
+    with span("shape"):
+        shape_script(pair.get("ur", "") for pair in segments)
+
+    timings = [
+        _segment_timing(pair, en_tts, ur_tts)
+        for pair, (en_tts, ur_tts) in zip(segments, tts_results)
+    ]
+
+    segment_audio: List[SegmentAudio] = []
+    voice_regions: List[Tuple[float, float]] = []
+    segment_start = 0.0
+    for (en_tts, ur_tts), timing in zip(tts_results, timings):
+        segment_audio.append(
+            SegmentAudio(
+                start=segment_start,
+                tracks=[(en_tts.path, timing.en_start), (ur_tts.path, timing.ur_start)],
+            )
+        )
+        voice_regions += [
+            (segment_start + s, segment_start + e) for s, e in _voice_regions(timing, en_tts, ur_tts)
+        ]
+        segment_start += timing.duration
+    total_duration = segment_start
+
+    progress(0.2, "audio")
+    if log:
+        log("[audio] Mixing voice track...")
+    with span("audio_mix"):
+        audio_path = write_wav(
+            mix_timeline(segment_audio, total_duration),
+            get_temp_audio_path(suffix="_voice.wav"),
+        )
+
+    # Add background music if provided
+    if bgm_path:
+        with span("bgm"):
+            audio_path = _mix_bgm(audio_path, bgm_path, bgm_volume, bgm_duck, voice_regions, log)
+
+    if workers > 1 and len(segments) > 1:
+        en_font = get_english_font_path(english_font_path)
+        ur_font = get_urdu_font_path(urdu_font_path)
+        with _render_pool(min(workers, len(segments)), bg_image, en_font, ur_font, settings) as pool:
+            # map() yields in script order as workers finish
+            frames = []
+            results = pool.map(_render_frame_task, range(1, len(segments) + 1), segments)
+            for idx, (frame, events) in enumerate(results, start=1):
+                _merge_worker_events(events)
+                progress(0.25 + 0.25 * idx / len(segments), "render")
+                if log:
+                    log(f"[segment {idx}/{len(segments)}] Rendered frame")
+                frames.append(frame)
+    else:
+        frames = []
+        for idx, pair in enumerate(segments, start=1):
+            progress(0.25 + 0.25 * (idx - 1) / len(segments), "render")
+            if log:
+                log(f"[segment {idx}/{len(segments)}] Rendering frame...")
+            with span("render_frame", segment=idx):
+                frame_img = _render_frame(bg_image, pair, english_font_path, urdu_font_path, settings)
+                frames.append(np.array(frame_img))
+
+    progress(0.5, "encode")
+    with span("clip_setup", segments=len(frames)):
+        clips = []
+        for img_array, timing in zip(frames, timings):
+            img_clip = ImageClip(img_array).set_duration(timing.duration)
+
+            clip = img_clip.fadein(VIDEO_FADE).fadeout(VIDEO_FADE)
+            clips.append(clip)
+
+        final = concatenate_videoclips(clips, method="compose")
+        final = final.set_fps(settings.fps).resize((settings.width, settings.height))
+        final = final.set_audio(AudioFileClip(audio_path))
+
+    ffmpeg_params = []
+    if profile.crf is not None:
+        ffmpeg_params += ["-crf", str(profile.crf)]
+    if profile.tune:
+        ffmpeg_params += ["-tune", profile.tune]
+    with span("write_videofile", frames=int(round(total_duration * settings.fps))):
+        final.write_videofile(
+            output_path,
+            codec=profile.codec,
+            audio_codec=profile.audio_codec,
+            audio_bitrate=profile.audio_bitrate,
+            fps=settings.fps,
+            threads=profile.threads or available_cores(),
+            preset=profile.preset,
+            ffmpeg_params=ffmpeg_params or None,
+        )
+
+    return output_path
+
+
+def resolve_encoder_profile(
+    profile: Union[str, EncoderProfile, None],
+    encoder: str,
+    draft: bool = False,
+) -> EncoderProfile:
+    """
+    Profile by name, or the default for the encoding path (draft renders use
+    "draft"). The ffmpeg path defaults to the profile 'app.cli calibrate'
+    picked on this machine, when one is recorded.
+    """
+    if isinstance(profile, EncoderProfile):
+        return profile
+    if profile:
+        name = profile
+    elif draft:
+        name = "draft"
+    else:
+        name = (encoder == "ffmpeg" and calibrated_profile()) or DEFAULT_ENCODER_PROFILES[encoder]
+    if name not in ENCODER_PROFILES:
+        raise ValueError(f"Unknown encoder profile {name!r}; expected one of {', '.join(ENCODER_PROFILES)}")
+    return ENCODER_PROFILES[name]
+
+
 def build_video(
     script_path: str,
     output_path: str,
@@ -33,108 +723,134 @@ def build_video(
     bgm_path: Optional[str] = None,
     bgm_volume: float = 0.1,
     log: Optional[callable] = None,
+    tts_config: Optional[TTSConfig] = None,
+    encoder: str = "moviepy",
+    bgm_duck: float = 1.0,
+    segment_cache: bool = True,
+    workers: int = 1,
+    progress: Optional[Callable[[float, str], None]] = None,
+    draft: bool = False,
+    profile: Union[str, EncoderProfile, None] = None,
+    trace: Optional[Tracer] = None,
+    stream: Optional[bool] = None,
+    threads: Optional[int] = None,
 ) -> str:
-    from .cleanup import ensure_temp_dirs, get_temp_image_path
-    
-    segments = _load_script(script_path)
-    if not segments:
-        raise ValueError("Script is empty")
+    """
+    Render a script to a video.
 
-    ensure_temp_dirs()
+    encoder selects how frames are encoded: "moviepy" composites every frame
+    through MoviePy, "ffmpeg" hands each still caption frame to ffmpeg and
+    joins the segment chunks with the concat demuxer (much faster).
 
-    if background_path:
-        bg_final = prepare_background_image(background_path)
-    else:
-        from PIL import Image
+    With the ffmpeg encoder and segment_cache enabled, encoded segment chunks
+    are cached by their inputs, so a rebuild after editing one line only
+    renders that line's segment.
 
-        img = Image.new("RGB", (VIDEO_WIDTH, VIDEO_HEIGHT), (15, 15, 24))
-        bg_final = get_temp_image_path(suffix="_fallback_bg.jpg")
-        img.save(bg_final, format="JPEG", quality=95)
+    bgm_duck scales the background music further while voice is playing
+    (1.0 leaves it at bgm_volume throughout).
 
-    clips = []
+    workers > 1 renders caption frames (and, with the ffmpeg encoder, whole
+    encoded segment chunks) in a process pool of that size.
 
-    for idx, pair in enumerate(segments, start=1):
-        if log:
-            log(f"[segment {idx}/{len(segments)}] Generating audio and frame...")
-        en_text = pair.get("en", "")
-        ur_text = pair.get("ur", "")
+    progress, if given, is called as progress(fraction, stage) with fraction
+    in [0, 1] and stage one of "tts", "audio", "render", "encode", "done".
 
-        en_tts = generate_english_tts(en_text)
-        ur_tts = generate_urdu_tts(ur_text)
+    draft renders a quick preview (DRAFT_RENDER_SETTINGS: half size, 12 fps,
+    simplified caption effects, "draft" encoder profile); speech comes from
+    the same TTS cache as the final render.
 
-        teaching_gap = 0.2
-        pause_after = float(pair.get("pause_after", 0.0) or 0.0)
-        min_duration = float(pair.get("min_duration", 0.0) or 0.0)
+    profile names an entry of ENCODER_PROFILES (or is an EncoderProfile);
+    by default the moviepy path uses "balanced" and the ffmpeg path the
+    calibrated profile (see app.cli calibrate), or "still" without one.
 
-        en_start = 0.0
-        ur_start = en_tts.duration + teaching_gap
-        total_audio_duration = ur_start + ur_tts.duration + pause_after
-
-        if total_audio_duration < min_duration:
-            total_audio_duration = min_duration
-
-        frame_img = render_caption_frame(
-            bg_final,
-            pair,
-            english_font_path=english_font_path,
-            urdu_font_path=urdu_font_path,
-        )
-        img_array = np.array(frame_img)
-        img_clip = ImageClip(img_array).set_duration(total_audio_duration)
+    trace, if given, records a span per stage (and per segment, including
+    those rendered in worker processes); export it with trace.export().
 
-        en_audio_clip = AudioFileClip(en_tts.path)
-        ur_audio_clip = AudioFileClip(ur_tts.path)
+    stream renders segment by segment from a script read incrementally, so
+    peak memory does not grow with the number of segments. It always
+    encodes through ffmpeg segment chunks (MoviePy composites the whole
+    timeline at once). None streams .jsonl scripts (one {en, ur} object
+    per line) and renders JSON arrays normally.
 
-        en_track = en_audio_clip.set_start(en_start).volumex(1.0)
-        ur_track = ur_audio_clip.set_start(ur_start).volumex(1.0)
+    threads overrides the encoder profile's thread count, e.g. to give each
+    of several builds running side by side its share of the cores.
 
-        mixed_audio = CompositeAudioClip([en_track, ur_track])
-        mixed_audio = mixed_audio.audio_fadein(0.12).audio_fadeout(0.12)
+    Intermediates go to the active cleanup.Workspace; without one the build
+    gets a private workspace that is removed when it returns.
+    """
+    from .cleanup import Workspace, current_workspace, ensure_temp_dirs
 
-        clip = img_clip.set_audio(mixed_audio)
-        clip = clip.fadein(0.5).fadeout(0.5)
-        clips.append(clip)
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unknown encoder {encoder!r}; expected one of {', '.join(ENCODERS)}")
+    if stream is None:
+        stream = _is_jsonl(script_path)
+    if stream:
+        encoder = "ffmpeg"
+    encoder_profile = resolve_encoder_profile(profile, encoder, draft)
+    if threads:
+        encoder_profile = replace(encoder_profile, threads=threads)
 
+    workspace = Workspace() if current_workspace() is None else contextlib.nullcontext()
+    with workspace, tracing(trace), span("build_video", encoder=encoder, draft=draft, stream=stream):
+        with span("load_script"):
+            if stream:
+                segments = None
+                segment_count = _count_script_entries(script_path)
+            else:
+                segments = _load_script(script_path)
+                segment_count = len(segments)
+        if not segment_count:
+            raise ValueError("Script is empty")
 
-    final = concatenate_videoclips(clips, method="compose")
-    final = final.set_fps(FPS).resize((VIDEO_WIDTH, VIDEO_HEIGHT))
+        ensure_temp_dirs()
 
-    # Add background music if provided
-    if bgm_path:
-        try:
-            bgm_audio = AudioFileClip(bgm_path)
-            
-            # Loop the BGM to match video duration
-            video_duration = final.duration
-            if bgm_audio.duration < video_duration:
-                # Calculate how many times to loop
-                loops_needed = int(video_duration / bgm_audio.duration) + 1
-                bgm_audio = bgm_audio.loop(n=loops_needed)
-            
-            # Trim BGM to match video duration
-            bgm_audio = bgm_audio.subclip(0, video_duration)
-            
-            # Set BGM volume (default is low to not overpower voices)
-            bgm_audio = bgm_audio.volumex(bgm_volume)
-            
-            # Mix BGM with existing audio
-            if final.audio:
-                final_audio = CompositeAudioClip([final.audio, bgm_audio])
-                final = final.set_audio(final_audio)
-            else:
-                final = final.set_audio(bgm_audio)
-        except Exception as e:
-            if log:
-                log(f"Warning: Could not add BGM: {e}")
-            # Continue without BGM if there's an error
-
-    final.write_videofile(
-        output_path,
-        codec="libx264",
-        audio_codec="aac",
-        fps=FPS,
-        threads=4,
-        preset="medium",
-    )
+        # Decode the background once; every caption frame is drawn on top of it
+        if background_path:
+            with span("background"):
+                bg_image = load_background(background_path)
+        else:
+            bg_image = Image.new("RGB", (VIDEO_WIDTH, VIDEO_HEIGHT), (15, 15, 24))
 
-    return output_path
+        tts_config = tts_config or DEFAULT_TTS_CONFIG
+        report = progress or (lambda fraction, stage: None)
+        settings = DRAFT_RENDER_SETTINGS if draft else DEFAULT_RENDER_SETTINGS
+        if stream or encoder == "ffmpeg":
+            # A streamed script is read a window at a time; a loaded one is a single window
+            result = _build_chunked(
+                iter_script(script_path) if stream else segments,
+                segment_count,
+                STREAM_WINDOW if stream else segment_count,
+                bg_image,
+                output_path,
+                english_font_path,
+                urdu_font_path,
+                bgm_path,
+                bgm_volume,
+                bgm_duck,
+                tts_config,
+                segment_cache,
+                workers,
+                settings,
+                encoder_profile,
+                log,
+                report,
+            )
+        else:
+            result = _build_with_moviepy(
+                segments,
+                bg_image,
+                output_path,
+                english_font_path,
+                urdu_font_path,
+                bgm_path,
+                bgm_volume,
+                bgm_duck,
+                tts_config,
+                workers,
+                settings,
+                encoder_profile,
+                log,
+                report,
+            )
+        report(1.0, "done")
+    return result
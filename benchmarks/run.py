@@ -0,0 +1,423 @@
+"""
+Offline microbenchmarks for the caption, text and audio hot paths.
+
+    python -m benchmarks.run                          # run all, JSON to stdout
+    python -m benchmarks.run -o bench.json            # save results
+    python -m benchmarks.run --compare baseline.json  # flag regressions (exit 1)
+    python -m benchmarks.run -k wrap -f urdu_heavy    # filter benchmarks / fixtures
+
+Each benchmark runs once per fixture script in benchmarks/fixtures, in a
+fresh worker process. Timings are per call of the benchmarked operation over
+the whole fixture. Memory is the worker's resident set high-water mark
+(peak_rss_kib), which includes Pillow and NumPy buffers, and its growth over
+the worker's footprint after imports (rss_growth_kib).
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no RSS high-water mark, memory is not recorded
+    resource = None
+
+from PIL import Image, ImageDraw
+
+from app import fonts, urdu_text
+from app import backgrounds
+from app.backgrounds import load_background
+from app.caption_renderer import render_caption_frame
+from app.config import DEFAULT_CAPTION_STYLE, DEFAULT_TTS_CONFIG, VIDEO_HEIGHT, VIDEO_WIDTH
+from app.fonts import get_english_font_path, get_urdu_font_path, load_font
+from app.urdu_text import shape_urdu, wrap_text_ltr, wrap_text_rtl
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# A median slower (or RSS growth larger) than the baseline by more than this
+# fraction is a regression
+DEFAULT_THRESHOLD = 0.10
+# RSS growth changes smaller than this are allocator noise, not regressions
+MEMORY_NOISE_KIB = 1024
+
+# Benchmark name -> factory(pairs, workdir) returning the operation to time
+Benchmark = Callable[[List[Dict[str, str]], str], Callable[[], Any]]
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def register(factory: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = factory
+        return factory
+
+    return register
+
+
+def load_fixtures(names: Optional[List[str]] = None) -> Dict[str, List[Dict[str, str]]]:
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.json"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if names and name not in names:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            fixtures[name] = json.load(f)
+    return fixtures
+
+
+def _scratch_draw() -> ImageDraw.ImageDraw:
+    return ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+
+def _wrap_width() -> int:
+    # Matches render_caption_frame's supersampled layout
+    style = DEFAULT_CAPTION_STYLE
+    return (int(VIDEO_WIDTH * style.box_width_ratio) - 2 * style.box_padding) * 2
+
+
+@benchmark("render_caption_frame")
+def bench_render_caption_frame(pairs, workdir):
+    bg = Image.new("RGB", (VIDEO_WIDTH, VIDEO_HEIGHT), (15, 15, 24))
+
+    def run():
+        for pair in pairs:
+            render_caption_frame(bg, pair)
+
+    return run
+
+
+@benchmark("render_caption_frame_draft")
+def bench_render_caption_frame_draft(pairs, workdir):
+    bg = Image.new("RGB", (VIDEO_WIDTH, VIDEO_HEIGHT), (15, 15, 24))
+
+    def run():
+        for pair in pairs:
+            render_caption_frame(bg, pair, draft=True)
+
+    return run
+
+
+@benchmark("wrap_text_ltr")
+def bench_wrap_text_ltr(pairs, workdir):
+    font = load_font(get_english_font_path(), DEFAULT_CAPTION_STYLE.en_font_size * 2)
+    draw = _scratch_draw()
+    width = _wrap_width()
+
+    def run():
+        for pair in pairs:
+            wrap_text_ltr(pair.get("en", ""), font, width, draw)
+
+    return run
+
+
+@benchmark("wrap_text_rtl")
+def bench_wrap_text_rtl(pairs, workdir):
+    font = load_font(get_urdu_font_path(), DEFAULT_CAPTION_STYLE.ur_font_size * 2)
+    draw = _scratch_draw()
+    width = _wrap_width()
+
+    def run():
+        for pair in pairs:
+            wrap_text_rtl(pair.get("ur", ""), font, width, draw)
+
+    return run
+
+
+@benchmark("shape_urdu_cold")
+def bench_shape_urdu_cold(pairs, workdir):
+    def run():
+        urdu_text._SHAPE_CACHE.clear()
+        for pair in pairs:
+            shape_urdu(pair.get("ur", ""))
+
+    return run
+
+
+@benchmark("shape_urdu_warm")
+def bench_shape_urdu_warm(pairs, workdir):
+    for pair in pairs:
+        shape_urdu(pair.get("ur", ""))
+
+    def run():
+        for pair in pairs:
+            shape_urdu(pair.get("ur", ""))
+
+    return run
+
+
+def _background_source(workdir: str) -> str:
+    # A camera-sized landscape photo stand-in; independent of the fixture text
+    source = os.path.join(workdir, "background_source.jpg")
+    if not os.path.exists(source):
+        Image.radial_gradient("L").resize((4000, 3000)).convert("RGB").save(source, quality=90)
+    return source
+
+
+@benchmark("prepare_background_image")
+def bench_prepare_background_image(pairs, workdir):
+    source = _background_source(workdir)
+
+    def run():
+        # Decode and cover-crop, bypassing the background cache
+        backgrounds._decode_prepared(source)
+
+    return run
+
+
+@benchmark("load_background_cached")
+def bench_load_background_cached(pairs, workdir):
+    source = _background_source(workdir)
+    load_background(source)
+
+    def run():
+        load_background(source)
+
+    return run
+
+
+@benchmark("font_resolution")
+def bench_font_resolution(pairs, workdir):
+    def run():
+        # Drop the in-process index so each call reads the persisted one, and
+        # stand in an empty fonts_config.json so its paths do not short-cut
+        # the index lookup
+        fonts._FONT_INDEX_CACHE = None
+        fonts._FONTS_CONFIG_CACHE = {}
+        get_english_font_path()
+        get_urdu_font_path()
+
+    return run
+
+
+def _voice_wavs(pairs, workdir) -> List[str]:
+    """Offline-synthesized speech for each English line, as WAV files."""
+    import wave
+
+    from app.tts_backends import _offline_pcm
+
+    paths = []
+    for i, pair in enumerate(pairs):
+        path = os.path.join(workdir, f"voice_{i:03d}.wav")
+        pcm = _offline_pcm(pair.get("en", ""), "bench", DEFAULT_TTS_CONFIG.offline_sample_rate, 0.06)
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(DEFAULT_TTS_CONFIG.offline_sample_rate)
+            wav.writeframes(pcm.tobytes())
+        paths.append(path)
+    return paths
+
+
+@benchmark("measure_audio")
+def bench_measure_audio(pairs, workdir):
+    from app.tts_layer import _measure_audio
+
+    paths = _voice_wavs(pairs, workdir)
+
+    def run():
+        for path in paths:
+            _measure_audio(path)
+
+    return run
+
+
+@benchmark("measure_audio_mp3")
+def bench_measure_audio_mp3(pairs, workdir):
+    from app.ffmpeg_encoder import run_ffmpeg
+    from app.tts_layer import _measure_audio
+
+    # Edge TTS returns 24 kHz mono MP3 at 48 kbit/s; pydub decodes it through ffmpeg
+    paths = []
+    for wav_path in _voice_wavs(pairs, workdir):
+        path = os.path.splitext(wav_path)[0] + ".mp3"
+        run_ffmpeg(["-i", wav_path, "-ar", "24000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "48k", path])
+        paths.append(path)
+
+    def run():
+        for path in paths:
+            _measure_audio(path)
+
+    return run
+
+
+def _max_rss_kib() -> Optional[float]:
+    """This process's resident set high-water mark so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 if sys.platform == "darwin" else float(peak)
+
+
+def run_benchmark(op: Callable[[], Any], repeat: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        op()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        op()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+    }
+
+
+def _run_isolated(
+    name: str, pairs: List[Dict[str, str]], workdir: str, repeat: int, warmup: int
+) -> Dict[str, Any]:
+    """Worker process entry point: set up and run one benchmark, recording its RSS peak."""
+    base = _max_rss_kib()
+    stats = run_benchmark(BENCHMARKS[name](pairs, workdir), repeat, warmup)
+    peak = _max_rss_kib()
+    if peak is not None:
+        stats["peak_rss_kib"] = round(peak, 1)
+        stats["rss_growth_kib"] = round(peak - base, 1)
+    return stats
+
+
+def run_all(
+    names: Optional[List[str]] = None,
+    fixtures: Optional[List[str]] = None,
+    repeat: int = 5,
+    warmup: int = 1,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the selected benchmarks over the selected fixtures.
+
+    Every benchmark and fixture runs in its own freshly spawned process, so
+    one benchmark's caches and memory high-water mark do not leak into the
+    next.
+
+    Args:
+        names: Substrings selecting benchmarks (default: all)
+        fixtures: Fixture names (default: all in benchmarks/fixtures)
+        repeat: Timed runs per benchmark and fixture
+        warmup: Untimed runs first
+        log: Called with one line per result
+
+    Returns:
+        {"meta": {...}, "results": {benchmark: {fixture: stats}}}; a
+        benchmark that cannot run here records {"error": ...} instead
+    """
+    from app.cleanup import Workspace
+
+    workspace = Workspace().activate()
+    workdir = os.path.join(workspace.root, "bench")
+    os.makedirs(workdir, exist_ok=True)
+
+    selected = [name for name in BENCHMARKS if not names or any(n in name for n in names)]
+    spawn = multiprocessing.get_context("spawn")
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for fixture_name, pairs in load_fixtures(fixtures).items():
+            for name in selected:
+                try:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                        stats = pool.submit(_run_isolated, name, pairs, workdir, repeat, warmup).result()
+                except Exception as e:
+                    stats = {"error": f"{type(e).__name__}: {e}"}
+                results.setdefault(name, {})[fixture_name] = stats
+                if log:
+                    if "error" in stats:
+                        log(f"{name:28s} {fixture_name:12s} skipped ({stats['error']})")
+                    else:
+                        memory = (
+                            f"  peak RSS {stats['peak_rss_kib'] / 1024:7.1f} MiB"
+                            f" (+{stats['rss_growth_kib'] / 1024:.1f})"
+                            if "peak_rss_kib" in stats
+                            else ""
+                        )
+                        log(f"{name:28s} {fixture_name:12s} median {stats['median_s'] * 1000:9.2f} ms{memory}")
+    finally:
+        workspace.close()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Lines describing each benchmark/fixture whose median time or RSS growth
+    regressed by more than threshold (RSS changes under MEMORY_NOISE_KIB
+    are ignored).
+    """
+    regressions = []
+    for name, by_fixture in current["results"].items():
+        for fixture, stats in by_fixture.items():
+            base = baseline.get("results", {}).get(name, {}).get(fixture)
+            if not base:
+                continue
+            if "median_s" in base and "median_s" in stats:
+                ratio = stats["median_s"] / base["median_s"] if base["median_s"] > 0 else 1.0
+                if ratio > 1.0 + threshold:
+                    regressions.append(
+                        f"{name} [{fixture}]: {base['median_s'] * 1000:.2f} ms -> "
+                        f"{stats['median_s'] * 1000:.2f} ms ({(ratio - 1) * 100:+.0f}%)"
+                    )
+            if "rss_growth_kib" in base and "rss_growth_kib" in stats:
+                growth = stats["rss_growth_kib"] - base["rss_growth_kib"]
+                if growth > max(threshold * base["rss_growth_kib"], MEMORY_NOISE_KIB):
+                    regressions.append(
+                        f"{name} [{fixture}]: RSS growth {base['rss_growth_kib'] / 1024:.1f} MiB -> "
+                        f"{stats['rss_growth_kib'] / 1024:.1f} MiB (peak {stats['peak_rss_kib'] / 1024:.1f} MiB)"
+                    )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Caption, text and audio microbenchmarks")
+    parser.add_argument("-k", dest="names", nargs="+", help="Only benchmarks whose name contains one of these")
+    parser.add_argument("-f", "--fixtures", nargs="+", help="Only these fixtures (short, long, urdu_heavy, words)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing")
+    parser.add_argument("--output", "-o", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed median slowdown or RSS growth before flagging (0.10 = 10%%)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_all(args.names, args.fixtures, args.repeat, args.warmup, log=lambda msg: print(msg, file=sys.stderr))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"[regression] {line}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print(f"[info] No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()